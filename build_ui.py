@@ -1,15 +1,514 @@
 #!/usr/bin/env python3
 """Build script to compile the React frontend and bundle it into the Python package."""
 
+from __future__ import annotations
+
+import argparse
+import hashlib
 import os
+import re
 import shutil
+import stat
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import posix
+except ImportError:  # pragma: no cover - Windows
+    posix = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    import _winapi
+except ImportError:  # pragma: no cover - POSIX
+    _winapi = None
+
+# Userspace buffer size for the copyfileobj fallback
+COPY_BUFSIZE = 256 * 1024
+
+# Kernel-side copy primitives, probed once at import
+_FICLONE = getattr(fcntl, "FICLONE", None)  # Linux reflink (btrfs, xfs, ...)
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")  # Linux, FreeBSD
+_HAS_FCOPYFILE = posix is not None and hasattr(posix, "_fcopyfile")  # macOS
+_HAS_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+_HAS_COPYFILE2 = _winapi is not None and hasattr(_winapi, "CopyFile2")  # Windows
+
+# Concurrent file copies; I/O bound, so more workers than cores
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Copier threads for robocopy on Windows
+ROBOCOPY_THREADS = 16
+
+# Environment for npm: skip the update-notifier and funding checks
+NPM_ENV = {**os.environ, "NPM_CONFIG_UPDATE_NOTIFIER": "false", "NPM_CONFIG_FUND": "false"}
+
+# Records the hash of the manifest node_modules was last installed from
+INSTALL_STAMP = ".install-stamp"
+
+# How often --watch checks the Vite output for a finished rebuild (seconds)
+WATCH_POLL_INTERVAL = 0.5
+
+# Independent frontend build steps, run concurrently.
+# Maps step name -> (package.json script, the command that script runs)
+BUILD_STEPS = {
+    "type check": ("typecheck", ["tsc"]),
+    "bundle": ("build:vite", ["vite", "build"]),
+}
+
+
+def _copy_file_range(infd: int, outfd: int) -> None:
+    """Copy a regular file with os.copy_file_range().
+
+    Lets the filesystem reflink the data or, on NFS 4.2, copy it server-side.
+    """
+    while os.copy_file_range(infd, outfd, 2**30) != 0:
+        pass
+
+
+def _sendfile(infd: int, outfd: int) -> None:
+    """Copy a regular file with os.sendfile(), entirely inside the kernel."""
+    offset = 0
+    while True:
+        sent = os.sendfile(outfd, infd, offset, 2**31 - 1)
+        if sent == 0:
+            return
+        offset += sent
+
+
+def _fastcopy(fsrc, fdst) -> None:
+    """Copy the contents of fsrc into fdst, avoiding userspace buffers where possible.
+
+    Falls back to shutil.copyfileobj() when no kernel primitive is available or
+    the filesystem refuses one before any data was written.
+    """
+    infd, outfd = fsrc.fileno(), fdst.fileno()
+    if _FICLONE is not None:
+        try:
+            fcntl.ioctl(outfd, _FICLONE, infd)  # O(1) copy-on-write clone
+            return
+        except OSError:
+            pass
+    if _HAS_COPY_FILE_RANGE:
+        try:
+            _copy_file_range(infd, outfd)
+            return
+        except OSError:
+            if os.lseek(outfd, 0, os.SEEK_CUR) != 0:
+                raise
+    if _HAS_FCOPYFILE:
+        try:
+            posix._fcopyfile(infd, outfd, posix._COPYFILE_DATA)
+            return
+        except OSError:
+            pass
+    if _HAS_SENDFILE:
+        try:
+            _sendfile(infd, outfd)
+            return
+        except OSError:
+            if os.lseek(outfd, 0, os.SEEK_CUR) != 0:
+                raise
+    shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)
+
+
+def _copy_file(src: str, dst: str, st: os.stat_result) -> None:
+    """Copy a single file and apply the already-known stat (mode and timestamps)."""
+    if _HAS_COPYFILE2:
+        _winapi.CopyFile2(src, dst, 0)
+    else:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            _fastcopy(fsrc, fdst)
+    os.chmod(dst, stat.S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+@dataclass
+class CopyStats:
+    """Summary of a tree copy."""
+
+    files: int = 0  # Files copied (hard-linked files are not counted)
+    bytes: int = 0  # Bytes copied
+    found_index: bool = False  # index.html is present at the top of the tree
+
+    def add(self, other: CopyStats) -> None:
+        """Accumulate the counters of a subtree copy."""
+        self.files += other.files
+        self.bytes += other.bytes
+
+
+def _robocopy(src: str | Path, dst: str | Path) -> CopyStats:
+    """Copy a tree with robocopy's multithreaded copier (Windows)."""
+    result = subprocess.run(
+        ["robocopy", str(src), str(dst), "/E", f"/MT:{ROBOCOPY_THREADS}"]
+        + ["/NFL", "/NDL", "/NJH", "/NJS", "/NP"],
+        stdout=subprocess.DEVNULL,
+    )
+    # Exit codes 0-7 are success bit flags; 8 and above mean failure
+    if result.returncode >= 8:
+        raise subprocess.CalledProcessError(result.returncode, result.args)
+
+    stats = CopyStats()
+    for root, _, files in os.walk(src):
+        if root == str(src):
+            stats.found_index = "index.html" in files
+        stats.files += len(files)
+        stats.bytes += sum(os.stat(os.path.join(root, name)).st_size for name in files)
+    return stats
+
+
+def _collect_tree(
+    src: str | Path, dst: str | Path, jobs: list[tuple[str, str, os.stat_result]]
+) -> None:
+    """Create every directory of src under dst and collect the files to copy."""
+    os.makedirs(dst, exist_ok=True)
+    with os.scandir(src) as it:
+        for entry in it:
+            target = os.path.join(dst, entry.name)
+            if entry.is_dir():
+                _collect_tree(entry.path, target, jobs)
+            else:
+                jobs.append((entry.path, target, entry.stat()))
+
+
+def _fast_copytree(src: str | Path, dst: str | Path) -> CopyStats:
+    """Recursively copy src into dst using os.scandir() and kernel-side file copies.
+
+    The directory skeleton is created first, then files are copied by a thread
+    pool so per-file syscall latency overlaps. On Windows the whole tree is
+    handed to robocopy instead, which copies many files concurrently where a
+    per-file loop is very slow.
+    """
+    if sys.platform == "win32":
+        return _robocopy(src, dst)
+
+    jobs: list[tuple[str, str, os.stat_result]] = []
+    _collect_tree(src, dst, jobs)
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        futures = [pool.submit(_copy_file, *job) for job in jobs]
+    for future in futures:
+        future.result()  # Re-raise the first failure
+
+    index_target = os.path.join(dst, "index.html")
+    return CopyStats(
+        files=len(jobs),
+        bytes=sum(st.st_size for _, _, st in jobs),
+        found_index=any(target == index_target for _, target, _ in jobs),
+    )
+
+
+def _sync_tree(src: str | Path, dst: str | Path, current: str | Path | None) -> CopyStats:
+    """Populate dst with the contents of src, reusing unchanged files from current.
+
+    Files whose size and mtime match the same entry in current are hard-linked
+    instead of copied, so an unchanged rebuild moves no file data. Entries that
+    only exist in current are not carried over. Copied files keep the source
+    mtime, so the next run compares equal.
+    """
+    if current is None:
+        return _fast_copytree(src, dst)
+    try:
+        with os.scandir(current) as it:
+            previous = {entry.name: entry for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return _fast_copytree(src, dst)
+
+    os.makedirs(dst, exist_ok=True)
+    stats = CopyStats()
+    with os.scandir(src) as it:
+        for entry in it:
+            target = os.path.join(dst, entry.name)
+            old = previous.get(entry.name)
+
+            if entry.is_dir():
+                stats.add(_sync_tree(entry.path, target, old.path if old else None))
+                continue
+
+            if entry.name == "index.html":
+                stats.found_index = True
+            st = entry.stat()
+            if old is not None and old.is_file(follow_symlinks=False):
+                old_st = old.stat(follow_symlinks=False)
+                if (old_st.st_size, old_st.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                    try:
+                        os.link(old.path, target)
+                        continue
+                    except OSError:
+                        pass  # No hard links here (e.g. FAT, cross-device); copy instead
+            _copy_file(entry.path, target, st)
+            stats.files += 1
+            stats.bytes += st.st_size
+
+    return stats
+
+
+def _exists(path: str | Path) -> bool:
+    """Check that a path exists with a single stat() call."""
+    try:
+        os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    return True
+
+
+def _dir_names(path: str | Path) -> set[str] | None:
+    """List a directory's entry names with one scandir(), or None if it is missing."""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+# Background deletions still running from the last publish
+_cleanup_threads: list[threading.Thread] = []
+
+
+def _rmtree_in_background(paths: list[Path]) -> None:
+    """Delete directory trees in a background thread."""
+
+    def remove_all() -> None:
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # Not a daemon thread: the interpreter waits for it before exiting
+    thread = threading.Thread(target=remove_all)
+    thread.start()
+    _cleanup_threads.append(thread)
+
+
+def _publish(dist_dir: Path, static_dir: Path) -> CopyStats:
+    """Replace static_dir with the contents of dist_dir.
+
+    The new tree is staged in a sibling directory and swapped in with
+    os.replace(), so an interrupted build leaves the previous assets intact and
+    a running server never serves a half-written tree. Old trees are deleted
+    in a background thread, overlapping with the copy.
+    """
+    staging = static_dir.with_name(static_dir.name + ".new")
+    retired = static_dir.with_name(static_dir.name + ".old")
+
+    # Let the previous publish finish deleting its trees
+    while _cleanup_threads:
+        _cleanup_threads.pop().join()
+
+    # One listing of the parent answers every existence check below
+    siblings = _dir_names(static_dir.parent) or set()
+
+    # Leftovers from an interrupted run: the staging/retired trees and the
+    # timestamped copies they are moved aside to, never other directories. The
+    # staging/retired names are freed with an O(1) rename; the trees
+    # themselves are deleted while we copy.
+    leftover_re = re.compile(rf"{re.escape(static_dir.name)}\.(?:new|old)(?:\.\d+)?", re.ASCII)
+    leftovers = []
+    for name in sorted(siblings):
+        if not leftover_re.fullmatch(name):
+            continue
+        path = static_dir.with_name(name)
+        if path in (staging, retired):
+            aside = path.with_name(f"{name}.{time.monotonic_ns()}")
+            os.replace(path, aside)
+            path = aside
+        leftovers.append(path)
+    if leftovers:
+        _rmtree_in_background(leftovers)
+
+    current = static_dir if static_dir.name in siblings else None
+    stats = _sync_tree(dist_dir, staging, current)
+
+    if current is not None:
+        os.replace(static_dir, retired)
+    os.replace(staging, static_dir)
+
+    if current is not None:
+        _rmtree_in_background([retired])
+
+    return stats
+
+
+def _deps_fingerprint(manifest: Path) -> str:
+    """Hash the dependency manifest (lockfile or package.json)."""
+    return hashlib.blake2b(manifest.read_bytes(), digest_size=16).hexdigest()
+
+
+def _deps_up_to_date(stamp: Path, fingerprint: str) -> bool:
+    """Check whether node_modules was installed from the current manifest."""
+    try:
+        return stamp.read_text().strip() == fingerprint
+    except OSError:
+        return False
+
+
+def _write_stamp(stamp: Path, fingerprint: str) -> None:
+    """Atomically record the manifest hash node_modules was installed from."""
+    tmp = stamp.with_name(stamp.name + ".tmp")
+    tmp.write_text(fingerprint)
+    os.replace(tmp, stamp)
+
+
+# Serializes job output so concurrent steps never interleave
+_output_lock = threading.Lock()
+
+
+def _run(cmd: list[str], cwd: Path) -> int:
+    """Run a command with its output captured, then emit the output in one piece.
+
+    Returns:
+        The command's exit status.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=1 << 16,
+        env=NPM_ENV,
+    )
+    output, _ = proc.communicate()
+    with _output_lock:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(output)
+        sys.stdout.buffer.flush()
+    return proc.returncode
+
+
+def _script_cmd(
+    frontend_dir: Path, script: str, argv: list[str], extra: tuple[str, ...] = ()
+) -> list[str]:
+    """Build the command for a package.json script.
+
+    Calls the binary in node_modules/.bin directly when it exists: going
+    through `npm run` costs an extra Node startup just to spawn it.
+    """
+    binary = shutil.which(argv[0], path=str(frontend_dir / "node_modules" / ".bin"))
+    if binary is None:
+        return ["npm", "run", script, *(("--", *extra) if extra else ())]
+    return [binary, *argv[1:], *extra]
+
+
+def _run_steps(steps: dict[str, list[str]], cwd: Path) -> list[str]:
+    """Run independent commands concurrently, capped at the CPU count.
+
+    Returns:
+        Names of the steps that failed.
+    """
+    workers = min(len(steps), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(_run, cmd, cwd) for name, cmd in steps.items()}
+    return [name for name, future in futures.items() if future.result() != 0]
+
+
+def _newest_mtime_ns(path: str | Path) -> int:
+    """Return the newest file mtime (in ns) under a directory tree."""
+    newest = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                newest = max(newest, _newest_mtime_ns(entry.path))
+            else:
+                newest = max(newest, entry.stat().st_mtime_ns)
+    return newest
+
+
+def _ui_up_to_date(frontend_dir: Path, dist_dir: Path, static_dir: Path) -> bool:
+    """Check whether the published UI is newer than every frontend input.
+
+    Inputs are everything under frontend/src plus the top-level frontend files
+    (index.html, package.json, the lockfile and the tool configs). The
+    published index.html must match the built one, which holds because
+    publishing preserves mtimes.
+    """
+    try:
+        built = (dist_dir / "index.html").stat()
+        published = (static_dir / "index.html").stat()
+    except FileNotFoundError:
+        return False
+    if (published.st_size, published.st_mtime_ns) != (built.st_size, built.st_mtime_ns):
+        return False
+
+    newest_input = _newest_mtime_ns(frontend_dir / "src")
+    with os.scandir(frontend_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                newest_input = max(newest_input, entry.stat().st_mtime_ns)
+    return built.st_mtime_ns >= newest_input
+
+
+def _watch(frontend_dir: Path, dist_dir: Path, static_dir: Path) -> int:
+    """Keep one `vite build --watch` process alive and publish each rebuild.
+
+    Polls the newest mtime under dist_dir and publishes once it has been
+    stable for a full poll interval, so half-written rebuilds are skipped.
+
+    Returns:
+        Exit status for the script.
+    """
+    print("\n👀 Watching frontend sources (Ctrl+C to stop)...")
+    script, argv = BUILD_STEPS["bundle"]
+    proc = subprocess.Popen(
+        _script_cmd(frontend_dir, script, argv, ("--watch",)), cwd=frontend_dir, env=NPM_ENV
+    )
+    seen = published = None
+    try:
+        while proc.poll() is None:
+            time.sleep(WATCH_POLL_INTERVAL)
+            try:
+                newest = _newest_mtime_ns(dist_dir)
+            except FileNotFoundError:
+                continue  # Vite is clearing dist for a rebuild
+            if newest == seen and newest != published and _exists(dist_dir / "index.html"):
+                try:
+                    stats = _publish(dist_dir, static_dir)
+                except FileNotFoundError:
+                    continue  # A new rebuild started mid-publish; retry once it settles
+                published = newest
+                print(f"📋 Published rebuild ({stats.files} file(s) updated)")
+            seen = newest
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping watcher...")
+        return 0
+    finally:
+        proc.terminate()
+        proc.wait()
+    return proc.returncode
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Create the command-line argument parser.
+
+    Returns:
+        Configured ArgumentParser instance
+    """
+    parser = argparse.ArgumentParser(
+        description="Build the React frontend and bundle it into the Python package",
+    )
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Rebuild even if the UI is newer than all frontend sources",
+    )
+    parser.add_argument(
+        "--watch",
+        "-w",
+        action="store_true",
+        help="Keep Vite running and republish the UI on every source change",
+    )
+    return parser
+
 
 def main():
     """Main build orchestration."""
+    args = create_argument_parser().parse_args()
+
     # Determine project root
     project_root = Path(__file__).parent.resolve()
     frontend_dir = project_root / "frontend"
@@ -21,55 +520,69 @@ def main():
     print(f"Frontend dir: {frontend_dir}")
 
     # Check if frontend directory exists
-    if not frontend_dir.exists():
+    frontend_names = _dir_names(frontend_dir)
+    if frontend_names is None:
         print(f"❌ Error: Frontend directory not found at {frontend_dir}")
         sys.exit(1)
 
-    # Change to frontend directory
-    os.chdir(frontend_dir)
+    # Nothing to do if no input changed since the last build
+    if not (args.force or args.watch) and _ui_up_to_date(frontend_dir, dist_dir, static_dir):
+        print("\n✅ UI up to date (use --force to rebuild)")
+        return
 
-    # Install npm dependencies
-    print("\n📦 Installing npm dependencies...")
-    try:
-        subprocess.run(["npm", "install"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error installing dependencies: {e}")
-        sys.exit(1)
+    # Install npm dependencies (from the lockfile when there is one)
+    lockfile = frontend_dir / "package-lock.json"
+    if lockfile.name in frontend_names:
+        manifest = lockfile
+        install_cmd = ["npm", "ci", "--prefer-offline", "--no-audit", "--no-fund"]
+    else:
+        manifest = frontend_dir / "package.json"
+        install_cmd = ["npm", "install", "--no-audit", "--no-fund"]
+    stamp = frontend_dir / "node_modules" / INSTALL_STAMP
+    fingerprint = _deps_fingerprint(manifest)
+
+    if _deps_up_to_date(stamp, fingerprint):
+        print("\n✅ npm dependencies up-to-date")
+    else:
+        print("\n📦 Installing npm dependencies...")
+        returncode = _run(install_cmd, frontend_dir)
+        if returncode:
+            print(f"❌ Error installing dependencies: exit status {returncode}")
+            sys.exit(returncode)
+        _write_stamp(stamp, fingerprint)
+
+    if args.watch:
+        sys.exit(_watch(frontend_dir, dist_dir, static_dir))
 
-    # Build the frontend
+    # Build the frontend (type check and bundle in parallel)
     print("\n🏗️  Building frontend...")
-    try:
-        subprocess.run(["npm", "run", "build"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error building frontend: {e}")
+    steps = {
+        name: _script_cmd(frontend_dir, script, argv)
+        for name, (script, argv) in BUILD_STEPS.items()
+    }
+    failed = _run_steps(steps, frontend_dir)
+    if failed:
+        print(f"❌ Error building frontend: {', '.join(failed)} failed")
         sys.exit(1)
 
     # Check if dist directory was created
-    if not dist_dir.exists():
+    if not _exists(dist_dir):
         print(f"❌ Error: Build output not found at {dist_dir}")
         sys.exit(1)
 
-    # Clear existing static directory
-    if static_dir.exists():
-        print(f"\n🧹 Cleaning existing static directory: {static_dir}")
-        shutil.rmtree(static_dir)
-
-    # Copy dist contents to static
-    print(f"\n📋 Copying build artifacts to {static_dir}...")
-    shutil.copytree(dist_dir, static_dir)
+    # Stage dist contents next to static and swap them in
+    print(f"\n📋 Publishing build artifacts to {static_dir}...")
+    stats = _publish(dist_dir, static_dir)
+    print(f"   {stats.files} file(s) updated, {stats.bytes / 1024:.1f} KiB copied")
 
     # Verify the copy
-    index_html = static_dir / "index.html"
-    if not index_html.exists():
+    if not stats.found_index:
         print(f"❌ Error: index.html not found in {static_dir}")
         sys.exit(1)
 
     print("\n✅ Build completed successfully!")
     print(f"   Static assets are ready at: {static_dir}")
 
-    # Return to project root
-    os.chdir(project_root)
-
 
 if __name__ == "__main__":
     main()
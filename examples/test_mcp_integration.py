@@ -5,23 +5,10 @@ This sends a JSON-RPC request to the MCP server to trigger a review.
 """
 
 import json
+import sys
 
-
-def send_mcp_request(request):
-    """Send a JSON-RPC request to the MCP server via stdio."""
-    # Convert request to JSON with newline
-    request_json = json.dumps(request) + "\n"
-    return request_json.encode()
-
-
-def main():
-    """Simulate Claude Code calling the request_human_review tool."""
-
-    print("🧪 Testing Redline MCP Integration\n")
-    print("=" * 60)
-
-    # Sample markdown document
-    sample_spec = """# Feature Specification: User Authentication
+# Sample markdown document
+SAMPLE_SPEC = """# Feature Specification: User Authentication
 
 ## Overview
 This document describes the authentication system for our application.
@@ -41,64 +28,87 @@ Session refresh will be handled automatically on the client side.
 - Multi-factor authentication will be optional
 """
 
-    print("\n📄 Sample Document:")
-    print("-" * 60)
-    print(sample_spec[:200] + "...")
-    print("-" * 60)
-
-    print("\n🔧 Simulating MCP Tool Call...")
-    print("\nTo test the full integration, you would:")
-    print("\n1. Add Redline to your Claude Desktop MCP config:")
-    print("   Location: ~/Library/Application Support/Claude/claude_desktop_config.json")
-    print("   (or %APPDATA%\\Claude\\claude_desktop_config.json on Windows)")
-    print("\n   Config:")
-    print(json.dumps({
-        "mcpServers": {
-            "redline": {
-                "command": "uv",
-                "args": ["run", "redline"],
-                "cwd": "/home/user/claude-redline"
-            }
+# Example JSON-RPC request
+REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tools/call",
+    "params": {
+        "name": "request_human_review",
+        "arguments": {
+            "markdown_spec": SAMPLE_SPEC,
+            "context": "Please review for clarity and completeness"
         }
-    }, indent=4))
-
-    print("\n2. Restart Claude Desktop")
-
-    print("\n3. Ask Claude something like:")
-    print('   "Here\'s a specification I wrote. Can you help me review it?')
-    print('    [paste the spec]"')
-
-    print("\n4. Claude will automatically:")
-    print("   • Recognize this is a good use case for human review")
-    print("   • Call the request_human_review tool")
-    print("   • Open a browser window for you to review")
-    print("   • Wait for your feedback")
-    print("   • Use your feedback to improve the document")
-
-    print("\n" + "=" * 60)
-    print("\n💡 For Manual Testing:")
-    print("\nYou can test the tool directly by running:")
-    print("   uv run redline")
-    print("\nThen in another terminal, send a JSON-RPC request:")
-
-    # Example JSON-RPC request
-    request = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "tools/call",
-        "params": {
-            "name": "request_human_review",
-            "arguments": {
-                "markdown_spec": sample_spec,
-                "context": "Please review for clarity and completeness"
-            }
+    }
+}
+
+
+def send_mcp_request(request):
+    """Send a JSON-RPC request to the MCP server via stdio."""
+    # Convert request to JSON with newline
+    request_json = json.dumps(request) + "\n"
+    return request_json.encode()
+
+
+# Constant payloads, serialized once at import
+_CONFIG_JSON = json.dumps({
+    "mcpServers": {
+        "redline": {
+            "command": "uv",
+            "args": ["run", "redline"],
+            "cwd": "/home/user/claude-redline"
         }
     }
+}, indent=4)
+_REQUEST_JSON = json.dumps(REQUEST, indent=2)
 
-    print("\n" + json.dumps(request, indent=2))
 
-    print("\n" + "=" * 60)
-    print("\n✅ Ready for Integration!")
+def main():
+    """Simulate Claude Code calling the request_human_review tool."""
+    # Collect the output and write it once instead of one write per line
+    parts = []
+
+    parts.append("🧪 Testing Redline MCP Integration\n")
+    parts.append("=" * 60)
+
+    parts.append("\n📄 Sample Document:")
+    parts.append("-" * 60)
+    parts.append(SAMPLE_SPEC[:200] + "...")
+    parts.append("-" * 60)
+
+    parts.append("\n🔧 Simulating MCP Tool Call...")
+    parts.append("\nTo test the full integration, you would:")
+    parts.append("\n1. Add Redline to your Claude Desktop MCP config:")
+    parts.append("   Location: ~/Library/Application Support/Claude/claude_desktop_config.json")
+    parts.append("   (or %APPDATA%\\Claude\\claude_desktop_config.json on Windows)")
+    parts.append("\n   Config:")
+    parts.append(_CONFIG_JSON)
+
+    parts.append("\n2. Restart Claude Desktop")
+
+    parts.append("\n3. Ask Claude something like:")
+    parts.append('   "Here\'s a specification I wrote. Can you help me review it?')
+    parts.append('    [paste the spec]"')
+
+    parts.append("\n4. Claude will automatically:")
+    parts.append("   • Recognize this is a good use case for human review")
+    parts.append("   • Call the request_human_review tool")
+    parts.append("   • Open a browser window for you to review")
+    parts.append("   • Wait for your feedback")
+    parts.append("   • Use your feedback to improve the document")
+
+    parts.append("\n" + "=" * 60)
+    parts.append("\n💡 For Manual Testing:")
+    parts.append("\nYou can test the tool directly by running:")
+    parts.append("   uv run redline")
+    parts.append("\nThen in another terminal, send a JSON-RPC request:")
+
+    parts.append("\n" + _REQUEST_JSON)
+
+    parts.append("\n" + "=" * 60)
+    parts.append("\n✅ Ready for Integration!")
+
+    sys.stdout.write("\n".join(parts) + "\n")
 
 
 if __name__ == "__main__":
@@ -11,12 +11,13 @@ AI agents like Claude to request human feedback during execution. When the
 4. Feedback is returned as structured JSON to the AI agent
 
 Architecture:
-    Main thread: Runs the MCP server (stdio communication with Claude)
-    Daemon thread: Runs the HTTP server for the web UI
+    Event loop: Runs the MCP server (stdio communication with Claude)
+    Uvicorn task: Serves the HTTP API and web UI on the same loop
     asyncio.Future: Blocks the tool call until user submits review
 
-The threading model ensures the MCP connection stays alive during potentially
-long user review sessions while the browser UI remains responsive.
+Awaiting the review future leaves the loop free, so the MCP connection stays
+alive during potentially long user review sessions while the browser UI
+remains responsive.
 
 Dynamic port allocation allows multiple Claude Code instances to run
 simultaneously without port conflicts.
@@ -33,28 +34,44 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
+import concurrent.futures
+import gzip
+import hashlib
+import importlib.util
 import logging
+import mimetypes
 import os
+import re
+import socket
+import stat
 import subprocess
 import sys
-import threading
 import time
 import webbrowser
-from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from functools import cache, lru_cache
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Final
 
+import orjson
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:  # Optional: static assets are then only gzip-compressed
+    HAS_BROTLI = False
+
 from redline.themes import (
     DEFAULT_THEME_NAME,
     get_theme,
@@ -73,98 +90,296 @@ logger = logging.getLogger(__name__)
 app_state: dict[str, Any] = {
     "content": "",
     "future": None,
-    "loop": None,  # Event loop for thread-safe future resolution
     "theme": DEFAULT_THEME_NAME,
     "base_dir": None,  # Working directory for file resolution
-    "diff_data": {},  # Git diff data: {file_path: {added_lines: [], removed_lines: []}}
+    "diff_data": {},  # Git diff data: {file_path: {added_ranges: [], removed_ranges: []}}
     "pending_review": None,  # Stores submitted review if tool call was interrupted
     "pending_review_time": None,  # Timestamp of pending review
     "http_port": None,  # Dynamically assigned HTTP server port
+    "http_socket": None,  # Listening socket bound for the HTTP server
+    "http_loop": None,  # Loop serving /api/events, for notifications from other threads
+    "content_event": None,  # Set (and replaced) on the HTTP loop when content changes
+    "ui_streams": set(),  # Open /api/events streams that haven't submitted a review
 }
 
 # Port configuration - now dynamic to support multiple instances
 DEFAULT_PORT = 6380  # Fallback if dynamic allocation fails
 
+# Use the C event loop and HTTP parser from uvicorn[standard] when installed
+# (uvloop is not available on Windows); main() runs both servers on HTTP_LOOP
+HTTP_LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+HTTP_PARSER = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+# Optional: pip install claude-redline[git]; imported on first diff, off the
+# startup path
+HAS_PYGIT2 = importlib.util.find_spec("pygit2") is not None
+
 
-def _find_free_port() -> int:
-    """Find an available port for the HTTP server.
+def _bind_http_socket() -> socket.socket:
+    """Bind the HTTP server's listening socket on a free loopback port.
 
-    Uses the OS to allocate a free port by binding to port 0,
-    then immediately closing the socket and returning the assigned port.
+    The OS picks the port (bind to port 0) and the socket stays open and
+    is handed to Uvicorn, so no other process can take the port between
+    allocation and server startup. Listening starts immediately, so the
+    browser's first connection queues until the server is ready.
 
     Returns:
-        An available port number.
+        A bound, listening socket.
     """
-    import socket
-
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("127.0.0.1", 0))
-        s.listen(1)
-        port: int = s.getsockname()[1]
-    return port
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(128)
+    except OSError:
+        sock.close()
+        raise
+    return sock
 
 
-# Lifespan context manager - signals when server is actually ready
+# Lifespan context manager - completes the startup handshake
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     """Manage FastAPI application lifespan events."""
-    # Startup: signal that server is ready to accept connections
-    http_server_started.set()
-    logger.info("HTTP server is now accepting connections")
+    # Startup: compress the UI off the loop, then complete the handshake.
+    # Uvicorn runs this before its create_server() call, so nothing is being
+    # accepted yet; but the socket handed over by start_http_server_if_needed
+    # is already listening, so a browser connecting now waits in its backlog
+    # and is served as soon as startup finishes.
+    await asyncio.to_thread(_static_assets)
+    _settle_http_server_ready(http_server_ready, port=app_state.get("http_port"))
+    logger.info("HTTP server startup complete")
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: fail a waiting tool call instead of leaving it hanging
     logger.info("HTTP server shutting down")
+    future: asyncio.Future[Any] | None = app_state.get("future")
+    if future is not None and not future.done():
+        future.get_loop().call_soon_threadsafe(_abort_review, future)
 
 
 # FastAPI application
-app = FastAPI(title="Redline Review Server", lifespan=lifespan)
-
-# Enable CORS for development
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+app = FastAPI(
+    title="Redline Review Server", lifespan=lifespan, default_response_class=ORJSONResponse
 )
 
+# The bundled UI (and the Vite dev proxy) are same-origin, so CORS is only
+# enabled on request for front ends served from elsewhere during development
+if os.environ.get("REDLINE_DEV") == "1":
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["GET", "POST"],
+        allow_headers=["Content-Type"],
+    )
+
 
 # API Endpoints
+@lru_cache(maxsize=1)
+def _content_body(content: str) -> tuple[bytes, str]:
+    """Serialize the /api/content payload and its ETag once per content."""
+    body = orjson.dumps({"content": content})
+    return body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
 @app.get("/api/content")
-async def get_content() -> JSONResponse:
+async def get_content(request: Request) -> Response:
     """Return the current markdown content for the review UI.
 
-    The React frontend polls this endpoint to retrieve the markdown
-    document that was submitted for review.
+    Fallback for browsers or proxies where the /api/events stream is
+    unavailable; the React frontend then polls this endpoint instead.
+    Repeat polls with a matching If-None-Match get an empty 304.
 
     Returns:
-        JSONResponse with {"content": "<markdown string>"}
+        Response with {"content": "<markdown string>"}
     """
-    return JSONResponse({"content": app_state.get("content", "")})
+    body, etag = _content_body(app_state.get("content", ""))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _publish_content_update() -> None:
+    """Wake every /api/events stream. Must run on the HTTP server's loop."""
+    event = app_state["content_event"]
+    # Each waiter holds the old event, so replace it instead of clearing
+    app_state["content_event"] = asyncio.Event()
+    if event is not None:
+        event.set()
+
+
+def notify_content_updated() -> None:
+    """Tell connected review UIs that app_state["content"] changed.
+
+    Safe to call from any thread; a no-op until the events endpoint has
+    been requested at least once.
+    """
+    loop = app_state.get("http_loop")
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(_publish_content_update)
+
+
+def _content_event(name: str) -> bytes:
+    """Encode the current content as a Server-Sent Events message."""
+    data, _ = _content_body(app_state.get("content", ""))
+    return b"event: " + name.encode() + b"\ndata: " + data + b"\n\n"
+
+
+@app.get("/api/events")
+async def stream_events() -> StreamingResponse:
+    """Push the markdown content to the review UI as Server-Sent Events.
+
+    Sends a "snapshot" event on connect and a "content-updated" event
+    whenever a new review request replaces the content, so the UI does
+    not have to poll /api/content. Open streams are tracked in
+    app_state["ui_streams"] so call_tool can reuse a tab that is still
+    reviewing instead of opening another.
+
+    Returns:
+        StreamingResponse with a text/event-stream body
+    """
+    if app_state.get("content_event") is None:
+        app_state["content_event"] = asyncio.Event()
+        app_state["http_loop"] = asyncio.get_running_loop()
+
+    async def events() -> AsyncIterator[bytes]:
+        # Take the event before sending, so no update can slip in between
+        event: asyncio.Event = app_state["content_event"]
+        stream = object()
+        app_state["ui_streams"].add(stream)
+        try:
+            yield _content_event("snapshot")
+            while True:
+                await event.wait()
+                if http_server is not None and http_server.should_exit:
+                    return  # let the connection close so shutdown need not wait
+                event = app_state["content_event"]
+                yield _content_event("content-updated")
+        finally:
+            app_state["ui_streams"].discard(stream)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@lru_cache(maxsize=8)
+def _config_body(theme_name: str) -> bytes:
+    """Serialize the /api/config payload for a theme once.
+
+    Raises:
+        ValueError: If theme name is not found
+    """
+    return orjson.dumps(
+        {
+            "theme": get_theme(theme_name),
+            "available_themes": list_themes(),
+        }
+    )
 
 
 @app.get("/api/config")
-async def get_config() -> JSONResponse:
+async def get_config() -> Response:
     """Return the current configuration including theme.
 
     The React frontend fetches this on startup to get the theme
     and other configuration settings.
 
     Returns:
-        JSONResponse with {"theme": ThemeDefinition}
+        JSON Response with {"theme": ThemeDefinition}
     """
     theme_name = app_state.get("theme", DEFAULT_THEME_NAME)
-    theme = get_theme(theme_name)
-    return JSONResponse(
-        {
-            "theme": theme,
-            "available_themes": list_themes(),
-        }
-    )
+    return Response(_config_body(theme_name), media_type="application/json")
+
+
+# Syntax highlighting language by file extension for the code viewer (read-only)
+EXT_TO_LANGUAGE: Final[Mapping[str, str]] = MappingProxyType(
+    {
+        ".py": "python",
+        ".js": "javascript",
+        ".jsx": "jsx",
+        ".ts": "typescript",
+        ".tsx": "tsx",
+        ".rs": "rust",
+        ".go": "go",
+        ".java": "java",
+        ".c": "c",
+        ".cpp": "cpp",
+        ".h": "c",
+        ".hpp": "cpp",
+        ".css": "css",
+        ".html": "html",
+        ".json": "json",
+        ".yaml": "yaml",
+        ".yml": "yaml",
+        ".md": "markdown",
+        ".sh": "bash",
+        ".sql": "sql",
+        ".rb": "ruby",
+        ".php": "php",
+        ".swift": "swift",
+        ".kt": "kotlin",
+        ".scala": "scala",
+        ".toml": "toml",
+    }
+)
+
+
+# Larger files are read on every request rather than cached, which keeps the
+# read cache under 128 entries * 512 KiB for the server's lifetime
+MAX_CACHED_FILE_SIZE = 512 * 1024
+
+
+def _read_file(abs_path: str) -> tuple[str, int, str]:
+    """Read a file for the code viewer.
+
+    Args:
+        abs_path: Resolved absolute path of the file
+
+    Returns:
+        Tuple of (content, line count, language)
+
+    Raises:
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
+    file_path = Path(abs_path)
+    data = file_path.read_bytes()
+    # Count lines on the raw bytes, before decoding
+    lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    language = EXT_TO_LANGUAGE.get(file_path.suffix.lower(), "text")
+    return data.decode("utf-8"), lines, language
+
+
+@lru_cache(maxsize=128)
+def _read_file_cached(abs_path: str, mtime_ns: int, size: int) -> tuple[str, int, str]:  # noqa: ARG001
+    """Read a file with _read_file, memoized per on-disk version.
 
+    mtime_ns and size are only part of the cache key, so an edited file
+    misses the cache and is read again. Only called for files up to
+    MAX_CACHED_FILE_SIZE.
 
+    Args:
+        abs_path: Resolved absolute path of the file
+        mtime_ns: Modification time from stat(), in nanoseconds
+        size: File size from stat(), in bytes
+
+    Returns:
+        Tuple of (content, line count, language)
+    """
+    return _read_file(abs_path)
+
+
+@lru_cache(maxsize=16)
+def _resolve_base_dir(base_dir: str) -> Path:
+    """Resolve a review's base directory once instead of on every file request."""
+    return Path(base_dir).resolve()
+
+
+# A plain def, so FastAPI runs it in its threadpool: the stat, resolve and read
+# calls below block, and the event loop is shared with the MCP server
 @app.get("/api/file")
-async def get_file(path: str) -> JSONResponse:
+def get_file(path: str) -> ORJSONResponse:
     """Return the contents of a file for the code viewer.
 
     Resolves the file path relative to the base_dir set during review.
@@ -174,78 +389,47 @@ async def get_file(path: str) -> JSONResponse:
         path: Relative or absolute path to the file
 
     Returns:
-        JSONResponse with {"content": str, "language": str, "lines": int}
+        ORJSONResponse with {"content": str, "language": str, "lines": int}
         or error response if file not found
     """
     base_dir = app_state.get("base_dir")
     if not base_dir:
         base_dir = os.getcwd()
 
-    # Resolve the file path
-    file_path = Path(path)
-    if not file_path.is_absolute():
-        file_path = Path(base_dir) / path
-
-    # Security: Ensure the path is within base_dir
+    # Resolve the file path (an absolute path replaces base_path when joined)
     try:
-        file_path = file_path.resolve()
-        base_path = Path(base_dir).resolve()
-        if not str(file_path).startswith(str(base_path)):
-            return JSONResponse(
-                {"error": "Access denied: path outside base directory"}, status_code=403
-            )
+        base_path = _resolve_base_dir(base_dir)
+        file_path = (base_path / path).resolve()
     except Exception as e:
-        return JSONResponse({"error": f"Invalid path: {e}"}, status_code=400)
-
-    if not file_path.exists():
-        return JSONResponse({"error": "File not found"}, status_code=404)
+        return ORJSONResponse({"error": f"Invalid path: {e}"}, status_code=400)
 
-    if not file_path.is_file():
-        return JSONResponse({"error": "Not a file"}, status_code=400)
+    # Security: Ensure the path is within base_dir. Compare whole path
+    # components, so a sibling such as "project-evil" does not match "project".
+    try:
+        rel_path = file_path.relative_to(base_path)
+    except ValueError:
+        return ORJSONResponse(
+            {"error": "Access denied: path outside base directory"}, status_code=403
+        )
 
+    # One stat answers "exists", "is a file" and the cache key
     try:
-        content = file_path.read_text(encoding="utf-8")
-        lines = content.count("\n") + (1 if content and not content.endswith("\n") else 0)
-
-        # Determine language from file extension
-        ext_to_language = {
-            ".py": "python",
-            ".js": "javascript",
-            ".jsx": "jsx",
-            ".ts": "typescript",
-            ".tsx": "tsx",
-            ".rs": "rust",
-            ".go": "go",
-            ".java": "java",
-            ".c": "c",
-            ".cpp": "cpp",
-            ".h": "c",
-            ".hpp": "cpp",
-            ".css": "css",
-            ".html": "html",
-            ".json": "json",
-            ".yaml": "yaml",
-            ".yml": "yaml",
-            ".md": "markdown",
-            ".sh": "bash",
-            ".sql": "sql",
-            ".rb": "ruby",
-            ".php": "php",
-            ".swift": "swift",
-            ".kt": "kotlin",
-            ".scala": "scala",
-            ".toml": "toml",
-        }
-        ext = file_path.suffix.lower()
-        language = ext_to_language.get(ext, "text")
+        st = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return ORJSONResponse({"error": "File not found"}, status_code=404)
+    except OSError as e:
+        return ORJSONResponse({"error": f"Error reading file: {e}"}, status_code=500)
 
-        # Get relative path for display
-        try:
-            rel_path = file_path.relative_to(base_path)
-        except ValueError:
-            rel_path = file_path
+    if not stat.S_ISREG(st.st_mode):
+        return ORJSONResponse({"error": "Not a file"}, status_code=400)
+
+    try:
+        if st.st_size <= MAX_CACHED_FILE_SIZE:
+            content, lines, language = _read_file_cached(str(file_path), st.st_mtime_ns, st.st_size)
+        else:
+            content, lines, language = _read_file(str(file_path))
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "content": content,
                 "language": language,
@@ -255,84 +439,213 @@ async def get_file(path: str) -> JSONResponse:
             }
         )
     except UnicodeDecodeError:
-        return JSONResponse({"error": "Binary file cannot be displayed"}, status_code=400)
+        return ORJSONResponse({"error": "Binary file cannot be displayed"}, status_code=400)
     except Exception as e:
-        return JSONResponse({"error": f"Error reading file: {e}"}, status_code=500)
+        return ORJSONResponse({"error": f"Error reading file: {e}"}, status_code=500)
+
+
+# {file_path: {"added_ranges": [[start, end], ...], "removed_ranges": [...]}},
+# with inclusive 1-based line ranges
+DiffData = dict[str, dict[str, list[list[int]]]]
+
+
+def _add_line_range(ranges: list[list[int]], start: int, count: int) -> None:
+    """Append count lines from start to ranges, extending the last run if adjacent."""
+    if count <= 0:
+        return
+    end = start + count - 1
+    if ranges and ranges[-1][1] + 1 == start:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
+
+
+def expand_line_ranges(ranges: list[list[int]]) -> list[int]:
+    """Expand inclusive [start, end] ranges into individual line numbers."""
+    return [line for start, end in ranges for line in range(start, end + 1)]
 
 
 @app.get("/api/diff")
-async def get_diff() -> JSONResponse:
+async def get_diff(format: str = "lines") -> ORJSONResponse:
     """Return the git diff data for highlighting changed lines.
 
     Returns the diff_data stored in app_state, which contains information
     about added and removed lines for each file.
 
+    Args:
+        format: "ranges" to return the stored [start, end] line ranges as
+            added_ranges/removed_ranges; anything else expands them into
+            added_lines/removed_lines for older UI builds
+
     Returns:
-        JSONResponse with diff data structure
+        ORJSONResponse with diff data structure
     """
-    return JSONResponse({"diff": app_state.get("diff_data", {})})
+    diff_data: DiffData = app_state.get("diff_data", {})
+    if format == "ranges":
+        return ORJSONResponse({"diff": diff_data})
+
+    return ORJSONResponse(
+        {
+            "diff": {
+                path: {
+                    "added_lines": expand_line_ranges(ranges["added_ranges"]),
+                    "removed_lines": expand_line_ranges(ranges["removed_ranges"]),
+                }
+                for path, ranges in diff_data.items()
+            }
+        }
+    )
+
+
+# File and hunk headers of `git diff --unified=0` output
+DIFF_HEADER_RE = re.compile(
+    rb"^(?:\+\+\+ (?:b/(?P<file>[^\n]*)|/dev/null)"
+    rb"|@@ -(?P<old>\d+)(?:,(?P<old_count>\d+))? \+(?P<new>\d+)(?:,(?P<new_count>\d+))? @@)",
+    re.MULTILINE,
+)
+
+
+def _skip_hunk_body(diff: bytes, pos: int, count: int) -> int:
+    """Return the offset just past a hunk's body.
+
+    Body lines are skipped rather than matched, so a changed line such as
+    "+++ b/x" is never mistaken for a file header.
+
+    Args:
+        diff: Raw `git diff` output
+        pos: Offset inside the hunk header line
+        count: Number of added plus removed lines in the hunk
+
+    Returns:
+        Offset of the first line after the hunk
+    """
+    pos = diff.find(b"\n", pos) + 1
+    while count > 0 and pos:
+        # "\ No newline at end of file" markers are not counted lines
+        if diff[pos : pos + 1] != b"\\":
+            count -= 1
+        pos = diff.find(b"\n", pos) + 1
+    return pos or len(diff)
+
+
+def _parse_git_diff_libgit2(base_dir: str) -> DiffData | None:
+    """Collect changed line ranges in-process through libgit2 (pygit2).
+
+    Args:
+        base_dir: Directory inside the repository to diff
+
+    Returns:
+        Same mapping as parse_git_diff, or None when pygit2 is not installed,
+        base_dir is not inside a repository, the index has staged new files,
+        or libgit2 fails, so the caller can fall back to the git CLI.
+    """
+    if not HAS_PYGIT2:
+        return None
+    import pygit2
+
+    try:
+        repo_path = pygit2.discover_repository(base_dir)
+        if repo_path is None:
+            return None
+
+        repo = pygit2.Repository(repo_path)
+        # Diffing HEAD against the working tree skips the index, so files
+        # staged as new (including the new side of a staged rename) would be
+        # missing; `git diff HEAD` handles those
+        if any(delta.status_char() == "A" for delta in repo.diff("HEAD", cached=True).deltas):
+            return None
+
+        # No context lines, so each hunk covers exactly the changed lines
+        diff = repo.diff("HEAD", context_lines=0)
+        # Match `git diff`'s default rename detection
+        diff.find_similar()
+
+        diff_data: DiffData = {}
+        for patch in diff:
+            # Skip what `git diff` prints without a "+++ b/" header
+            if (
+                patch is None
+                or not patch.hunks
+                or patch.delta.is_binary
+                or patch.delta.status_char() == "D"
+            ):
+                continue
+
+            added_ranges: list[list[int]] = []
+            removed_ranges: list[list[int]] = []
+            for hunk in patch.hunks:
+                _add_line_range(added_ranges, hunk.new_start, hunk.new_lines)
+                _add_line_range(removed_ranges, hunk.old_start, hunk.old_lines)
+
+            diff_data[patch.delta.new_file.path] = {
+                "added_ranges": added_ranges,
+                "removed_ranges": removed_ranges,
+            }
+        return diff_data
+    except (pygit2.GitError, KeyError, ValueError) as e:
+        logger.warning(f"libgit2 diff failed, falling back to git CLI: {e}")
+        return None
 
 
-def parse_git_diff(base_dir: str) -> dict[str, dict[str, list[int]]]:
-    """Parse git diff to identify added and removed lines.
+def parse_git_diff(base_dir: str) -> DiffData:
+    """Parse git diff to identify added and removed line ranges.
 
-    Runs `git diff HEAD` in the base directory and parses the output
-    to identify which lines were added or removed in each file.
+    Uses libgit2 when the optional pygit2 dependency is installed, otherwise
+    runs `git diff HEAD --unified=0` in the base directory. Without context
+    lines each hunk header gives the exact changed line ranges, so only the
+    headers are matched (in C, on the raw bytes) and hunk bodies are skipped.
 
     Args:
         base_dir: Directory to run git diff in
 
     Returns:
-        Dict mapping file paths to {"added_lines": [...], "removed_lines": [...]}
+        Dict mapping file paths to {"added_ranges": [[start, end], ...],
+        "removed_ranges": [...]}, with inclusive line ranges
     """
-    diff_data: dict[str, dict[str, list[int]]] = {}
+    libgit2_data = _parse_git_diff_libgit2(base_dir)
+    if libgit2_data is not None:
+        return libgit2_data
+
+    diff_data: DiffData = {}
 
     try:
         # Get the diff output
         result = subprocess.run(
-            ["git", "diff", "HEAD"], cwd=base_dir, capture_output=True, text=True, timeout=30
+            ["git", "diff", "HEAD", "--unified=0", "--no-color", "--no-ext-diff"],
+            cwd=base_dir,
+            capture_output=True,
+            timeout=30,
         )
 
         if result.returncode != 0:
-            logger.warning(f"git diff failed: {result.stderr}")
+            logger.warning(f"git diff failed: {result.stderr.decode(errors='replace')}")
             return diff_data
 
-        current_file = None
-        current_line_old = 0
-        current_line_new = 0
-
-        for line in result.stdout.split("\n"):
-            # New file header
-            if line.startswith("+++ b/"):
-                current_file = line[6:]  # Remove "+++ b/" prefix
-                diff_data[current_file] = {"added_lines": [], "removed_lines": []}
-
-            # Hunk header: @@ -old_start,old_count +new_start,new_count @@
-            elif line.startswith("@@"):
-                # Parse the line numbers
-                parts = line.split(" ")
-                for part in parts:
-                    if part.startswith("+") and "," in part:
-                        current_line_new = int(part[1:].split(",")[0])
-                    elif part.startswith("+") and part[1:].isdigit():
-                        current_line_new = int(part[1:])
-
-            # Added line
-            elif line.startswith("+") and not line.startswith("+++"):
-                if current_file and current_file in diff_data:
-                    diff_data[current_file]["added_lines"].append(current_line_new)
-                current_line_new += 1
-
-            # Removed line (we track these but they don't exist in the current file)
-            elif line.startswith("-") and not line.startswith("---"):
-                if current_file and current_file in diff_data:
-                    diff_data[current_file]["removed_lines"].append(current_line_old)
-                current_line_old += 1
-
-            # Context line (unchanged)
-            elif not line.startswith("\\"):
-                current_line_new += 1
-                current_line_old += 1
+        stdout: bytes = result.stdout
+        current_file: dict[str, list[list[int]]] | None = None
+        pos = 0
+
+        while (match := DIFF_HEADER_RE.search(stdout, pos)) is not None:
+            pos = match.end()
+
+            # New file header; deleted files ("+++ /dev/null") have nothing to show
+            if match["old"] is None:
+                current_file = None
+                if match["file"] is not None:
+                    current_file = diff_data.setdefault(
+                        os.fsdecode(match["file"]), {"added_ranges": [], "removed_ranges": []}
+                    )
+                continue
+
+            # Without context lines a hunk's header fully determines its line ranges
+            old_start, old_count = int(match["old"]), int(match["old_count"] or 1)
+            new_start, new_count = int(match["new"]), int(match["new_count"] or 1)
+            if current_file is not None:
+                # Removed lines are tracked but don't exist in the current file
+                _add_line_range(current_file["removed_ranges"], old_start, old_count)
+                _add_line_range(current_file["added_ranges"], new_start, new_count)
+
+            pos = _skip_hunk_body(stdout, pos, old_count + new_count)
 
     except subprocess.TimeoutExpired:
         logger.warning("git diff timed out")
@@ -342,8 +655,20 @@ def parse_git_diff(base_dir: str) -> dict[str, dict[str, list[int]]]:
     return diff_data
 
 
+def _abort_review(future: asyncio.Future[Any]) -> None:
+    """Fail a pending review because the review UI server went away."""
+    if not future.done():
+        future.set_exception(RuntimeError("Review server shut down before a review was submitted"))
+
+
+def _resolve_review(future: asyncio.Future[Any], data: dict[str, Any]) -> None:
+    """Deliver a review unless the tool call was cancelled or resolved meanwhile."""
+    if not future.done():
+        future.set_result(data)
+
+
 @app.post("/api/submit")
-async def submit_review(data: dict[str, Any]) -> JSONResponse:
+async def submit_review(data: dict[str, Any]) -> ORJSONResponse:
     """Accept the user's review submission and unblock the MCP tool call.
 
     This endpoint receives the user's feedback from the React UI and resolves
@@ -358,110 +683,430 @@ async def submit_review(data: dict[str, Any]) -> JSONResponse:
             - user_overall_comment: Optional summary comment
 
     Returns:
-        JSONResponse with {"status": "ok"}
+        ORJSONResponse with {"status": "ok"}
     """
-    num_comments = len(data.get("comments", []))
-    overall_comment = data.get("user_overall_comment")
-
-    if overall_comment == "LGTM" and num_comments == 0:
-        logger.info("Review submitted: LGTM (approved with no comments)")
-    elif num_comments == 0 and not overall_comment:
-        logger.info("Review submitted: Approved with no comments")
-    elif overall_comment:
-        logger.info(
-            f"Review submitted with {num_comments} inline comments "
-            f"and overall comment: '{overall_comment}'"
-        )
-    else:
-        logger.info(f"Review submitted with {num_comments} inline comments")
+    if logger.isEnabledFor(logging.INFO):
+        comments = data.get("comments")
+        num_comments = len(comments) if comments else 0
+        overall_comment = data.get("user_overall_comment")
+
+        if overall_comment == "LGTM" and num_comments == 0:
+            logger.info("Review submitted: LGTM (approved with no comments)")
+        elif num_comments == 0 and not overall_comment:
+            logger.info("Review submitted: Approved with no comments")
+        elif overall_comment:
+            logger.info(
+                f"Review submitted with {num_comments} inline comments "
+                f"and overall comment: '{overall_comment}'"
+            )
+        else:
+            logger.info(f"Review submitted with {num_comments} inline comments")
 
     # Always store the review as pending (in case tool call is interrupted)
     app_state["pending_review"] = data
     app_state["pending_review_time"] = time.time()
+    # The submitting tab now only shows "Review Submitted", and we can't tell
+    # which stream it was, so none of the open tabs can take the next review
+    app_state["ui_streams"].clear()
 
-    # Resolve the future with the submitted data (thread-safe)
-    future = app_state.get("future")
-    loop = app_state.get("loop")
-    if future and isinstance(future, asyncio.Future) and not future.done():
-        if loop and loop.is_running():
-            # Production: called from HTTP thread, use thread-safe method
-            loop.call_soon_threadsafe(future.set_result, data)
-        else:
-            # Tests or same-thread: direct call is safe
-            future.set_result(data)
+    # Resolve the future with the submitted data on the loop that owns it
+    future: asyncio.Future[Any] | None = app_state.get("future")
+    if future is not None and not future.done():
+        future.get_loop().call_soon_threadsafe(_resolve_review, future, data)
 
-    return JSONResponse({"status": "ok"})
+    return ORJSONResponse({"status": "ok"})
 
 
-# Mount static files
+# Assets smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Brotli 10-11 is ~40x slower than 9 (seconds for the JS bundle) for ~8%
+# smaller output, and assets are compressed while the MCP server starts
+BROTLI_QUALITY = 9
+
+# Media types worth compressing besides text/*; images and fonts are already
+# compressed. mimetypes maps .js to application/javascript on some systems.
+_COMPRESSIBLE_TYPES = frozenset(
+    {"application/javascript", "text/javascript", "application/json", "image/svg+xml"}
+)
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """A built UI file held in memory, ready to send."""
+
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    # Pre-compressed bodies by Content-Encoding ("br", "gzip")
+    encoded: Mapping[str, bytes] = field(default_factory=dict)
+
+
+def _compress_asset(body: bytes, media_type: str) -> dict[str, bytes]:
+    """Pre-compress a text asset once, when the assets are loaded.
+
+    Args:
+        body: Uncompressed file contents
+        media_type: The asset's media type
+
+    Returns:
+        Dict of Content-Encoding to compressed body, only for encodings that
+        make the asset smaller
+    """
+    compressible = media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+    if len(body) < MIN_COMPRESS_SIZE or not compressible:
+        return {}
+
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if HAS_BROTLI:
+        encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return {coding: data for coding, data in encoded.items() if len(data) < len(body)}
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse an Accept-Encoding header, dropping codings refused with q=0."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = params.replace(" ", "").removeprefix("q=")
+        if quality and quality.strip("0.") == "":
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _load_static_assets(directory: Path) -> dict[str, StaticAsset]:
+    """Read every built UI file into memory with its ETag and cache policy.
+
+    The bundle does not change while the server runs, so each file is
+    read once instead of being stat'ed, opened and read on every request.
+
+    Args:
+        directory: Built frontend directory
+
+    Returns:
+        Dict mapping URL paths (relative, "/"-separated) to assets
+    """
+    assets: dict[str, StaticAsset] = {}
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file():
+            continue
+        rel_path = path.relative_to(directory).as_posix()
+        body = path.read_bytes()
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        assets[rel_path] = StaticAsset(
+            body=body,
+            media_type=media_type,
+            etag=f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"',
+            # Vite puts content-hashed files under assets/; index.html must be revalidated
+            cache_control=(
+                "public, max-age=31536000, immutable"
+                if rel_path.startswith("assets/")
+                else "no-cache"
+            ),
+            encoded=_compress_asset(body, media_type),
+        )
+    return assets
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an asset's ETag."""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+# Built frontend, served from memory
 static_dir = Path(__file__).parent / "static"
-if static_dir.exists():
-    app.mount("/", StaticFiles(directory=str(static_dir), html=True), name="static")
-else:
-    logger.warning(f"Static directory not found: {static_dir}")
-    logger.warning("Run 'python build_ui.py' to build the frontend assets")
 
 
-# HTTP Server Thread
-http_server_thread: threading.Thread | None = None
-http_server_started = threading.Event()
+@cache
+def _static_assets() -> Mapping[str, StaticAsset]:
+    """Load the built frontend on first use rather than at import.
 
+    Compressing the bundle is the slowest part of startup, so the HTTP
+    server's lifespan does it in a worker thread instead of delaying the
+    MCP handshake.
+
+    Returns:
+        Read-only mapping of URL path to asset, empty if the UI isn't built
+    """
+    if not static_dir.is_dir():
+        logger.warning(f"Static directory not found: {static_dir}")
+        logger.warning("Run 'python build_ui.py' to build the frontend assets")
+        return MappingProxyType({})
+    return MappingProxyType(_load_static_assets(static_dir))
 
-def run_http_server() -> None:
-    """Run the FastAPI/Uvicorn HTTP server in a daemon thread.
 
-    Binds to 127.0.0.1 on the dynamically allocated port (localhost only for security).
-    Sets the http_server_started event when ready to accept connections.
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_static_asset(full_path: str, request: Request) -> Response:
+    """Serve the review UI's static files from memory.
+
+    Registered after the API routes so it only sees non-API paths.
+    Directory paths map to their index.html, as with StaticFiles(html=True).
+    Sends the pre-compressed body (Brotli, then gzip) the browser accepts.
+
+    Args:
+        full_path: Request path relative to the site root
+        request: Incoming request, for If-None-Match and Accept-Encoding
+
+    Returns:
+        The asset, 304 Not Modified if the browser's copy is current, or 404
     """
+    if not full_path or full_path.endswith("/"):
+        full_path += "index.html"
+    asset = _static_assets().get(full_path)
+    if asset is None:
+        return Response("Not Found", status_code=404, media_type="text/plain")
+
+    body, etag = asset.body, asset.etag
+    headers = {"Cache-Control": asset.cache_control}
+    if asset.encoded:
+        headers["Vary"] = "Accept-Encoding"
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for coding in ("br", "gzip"):
+            if coding in asset.encoded and coding in accepted:
+                body = asset.encoded[coding]
+                # Each representation gets its own strong ETag
+                etag = f'{etag[:-1]}-{coding}"'
+                headers["Content-Encoding"] = coding
+                break
+
+    headers["ETag"] = etag
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=asset.media_type, headers=headers)
+
+
+# HTTP server task, running on the MCP server's event loop; all three are
+# None whenever no server task is running
+http_server: uvicorn.Server | None = None
+http_server_task: asyncio.Task[None] | None = None
+# Completed with the port by the lifespan startup, or with the startup error
+http_server_ready: concurrent.futures.Future[int] | None = None
+
+
+def _settle_http_server_ready(
+    ready: concurrent.futures.Future[int] | None,
+    port: int | None = None,
+    error: Exception | None = None,
+) -> None:
+    """Complete the startup handshake once, unless the waiter has given up."""
+    if ready is None or ready.done() or not ready.set_running_or_notify_cancel():
+        return
+    if error is None:
+        ready.set_result(int(port or DEFAULT_PORT))
+    else:
+        ready.set_exception(error)
+
+
+async def run_http_server() -> None:
+    """Serve the FastAPI app with Uvicorn on the current event loop.
+
+    Serves on the socket bound by start_http_server_if_needed, or binds to
+    127.0.0.1 on the allocated port (localhost only for security).
+    The lifespan startup completes http_server_ready just before Uvicorn
+    starts accepting. On the handed-over socket, which is already listening,
+    early connections wait in the backlog; when Uvicorn binds its own socket,
+    the bind also comes after the handshake. If the server fails or exits
+    before the handshake, this completes it with the error. Clears the server
+    globals when it exits, so a stopped server is not mistaken for a live one.
+    """
+    global http_server, http_server_task, http_server_ready
+
     port = app_state.get("http_port", DEFAULT_PORT)
+    sock: socket.socket | None = app_state.get("http_socket")
+    ready = http_server_ready
     try:
         logger.info(f"Starting HTTP server on port {port}")
         config = uvicorn.Config(
             app,
             host="127.0.0.1",
             port=port,
-            log_level="info",
+            log_level="warning",  # our own logger reports start/stop
             access_log=False,
+            http=HTTP_PARSER,
+            lifespan="on",
+            # Plain HTTP JSON API on loopback: skip what we don't use
+            ws="none",
+            interface="asgi3",
+            server_header=False,
+            date_header=False,
+            proxy_headers=False,
+            # /api/events streams never finish, so bound the wait for them
+            timeout_graceful_shutdown=1,
+            # A single local browser: keep its connection open between
+            # actions, and cap connections so a runaway tab can't pile up
+            timeout_keep_alive=75,
+            limit_concurrency=64,
         )
-        server = uvicorn.Server(config)
-        # Note: http_server_started is set by the FastAPI startup event
-        server.run()
+        server = http_server = uvicorn.Server(config)
+        # Note: http_server_ready is completed by the FastAPI lifespan startup
+        await server.serve(sockets=[sock] if sock is not None else None)
     except Exception as e:
         logger.error(f"HTTP server error: {e}")
+        _settle_http_server_ready(ready, error=e)
+    finally:
+        _settle_http_server_ready(ready, error=RuntimeError("HTTP server exited during startup"))
+        # Leave the globals alone if a newer server has already replaced this one
+        if http_server_ready is ready:
+            http_server = None
+            http_server_task = None
+            http_server_ready = None
 
 
-def start_http_server_if_needed() -> int:
-    """Start the HTTP server in a background thread if not already running.
+async def start_http_server_if_needed() -> int:
+    """Start the HTTP server as a task on the running loop if not already running.
 
-    Creates a daemon thread so the server automatically stops when the
-    main process exits. Waits up to 5 seconds for the server to be ready.
-    Allocates a dynamic port to support multiple concurrent instances.
+    Sharing the MCP server's loop means no extra thread, and a submitted
+    review resolves the tool call's future on the loop that owns it. Waits
+    up to 5 seconds for the server to be ready, returning as soon as the
+    lifespan startup completes the handshake. Allocates a dynamic port to
+    support multiple concurrent instances.
 
     Returns:
         The port number the HTTP server is running on.
     """
-    global http_server_thread
-
-    if http_server_thread is None or not http_server_thread.is_alive():
-        # Allocate a free port for this instance
-        port = _find_free_port()
+    global http_server_task, http_server_ready
+
+    if http_server_task is None or http_server_task.done():
+        # Bind a free port for this instance and keep it open for Uvicorn
+        old_sock: socket.socket | None = app_state.get("http_socket")
+        if old_sock is not None:
+            old_sock.close()
+        sock = _bind_http_socket()
+        port = sock.getsockname()[1]
+        app_state["http_socket"] = sock
         app_state["http_port"] = port
 
-        http_server_thread = threading.Thread(
-            target=run_http_server, daemon=True, name="HTTPServerThread"
-        )
-        http_server_thread.start()
+        ready = http_server_ready = concurrent.futures.Future()
+        http_server_task = asyncio.create_task(run_http_server(), name="redline-http")
         # Wait for server to start
-        http_server_started.wait(timeout=5)
-        logger.info(f"HTTP server thread started on port {port}")
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(ready), timeout=5)
+            logger.info(f"HTTP server started on port {port}")
+        except TimeoutError:
+            logger.warning(f"HTTP server on port {port} not ready after 5s, continuing")
+        except Exception as e:
+            logger.error(f"HTTP server failed to start: {e}")
 
     return int(app_state.get("http_port", DEFAULT_PORT))
 
 
+async def stop_http_server() -> None:
+    """Shut the HTTP server down gracefully and wait for its task to finish.
+
+    Runs the lifespan shutdown (failing any waiting review) instead of
+    leaving the task to be cancelled when the event loop closes.
+    """
+    task = http_server_task
+    if task is None or task.done():
+        return
+    if http_server is None:
+        # Not yet past startup, so there is nothing to shut down gracefully
+        task.cancel()
+    else:
+        http_server.should_exit = True
+        # End open /api/events streams, which would otherwise hold shutdown
+        if app_state.get("content_event") is not None:
+            _publish_content_update()
+    await asyncio.wait([task])
+
+
 # MCP Server
 mcp_server = Server("redline")
 
 
+# Tool definition, built once and returned on every tools/list request
+REQUEST_HUMAN_REVIEW_TOOL: Final[Tool] = Tool(
+    name="request_human_review",
+    description=(
+        "# Redline Review Tool\n\n"
+        "Request human review via browser interface for interactive feedback with highlighting and comments.\n\n"
+        "## WHEN TO USE THIS TOOL\n\n"
+        "**ALWAYS use this tool when:**\n\n"
+        "1. **Code Reviews & PR Analysis** - When reviewing pull requests, analyzing code changes, or providing "
+        "feedback on implementations. Present your findings so the user can highlight concerns and add comments "
+        "on specific sections.\n\n"
+        "2. **Technical Analysis Deliverables** - When providing substantive technical analysis (architectural "
+        "review, performance analysis, security audit, trade-off analysis) that exceeds 200 words or contains "
+        "multiple distinct findings.\n\n"
+        "3. **Implementation Plans** - Before implementing complex changes, present the plan for approval. User "
+        "can mark sections as approved, needs-revision, or add clarifying questions.\n\n"
+        "4. **Phase Completion Summaries** - After completing a significant phase of work (especially when "
+        "marking 3+ todos as completed), present a walkthrough of what was done for review and sign-off. "
+        "This allows users to review all changes in one structured document with clickable code references.\n\n"
+        "5. **Recommendations with Options** - When presenting multiple approaches or recommendations where the "
+        "user needs to make decisions. They can annotate preferences directly on each option.\n\n"
+        "6. **Explicit Requests** - When user asks for a 'redline', 'redline document', 'review document', "
+        "'present for review', or 'create a document for review'.\n\n"
+        "**DO NOT use this tool for:**\n"
+        "- Simple Q&A responses\n"
+        "- Short clarifications or explanations\n"
+        "- Status updates under 200 words\n"
+        "- Single, straightforward task completions\n"
+        "- When user explicitly asks for inline/chat response\n\n"
+        "## DEFAULT MINDSET\n\n"
+        "**When in doubt, use redline.** It's better to provide interactive review capability for substantial "
+        "content than to present it as plain text. Users can always read it linearly if they prefer, but redline "
+        "gives them the option to highlight sections, add contextual comments, and click through to code. "
+        "Redline makes technical content more actionable.\n\n"
+        "## FORMATTING BEST PRACTICES\n\n"
+        "Structure your markdown for easy annotation:\n"
+        "- Use clear **## Section Headers** so users can comment on specific sections\n"
+        "- Use **numbered lists** for recommendations/findings (easier to reference: 'I disagree with point 3')\n"
+        "- Use **tables** for comparisons and trade-offs\n"
+        "- Include **code references** using `[[file:path/to/file.py:42]]` or `[[file:path/to/file.py:42-50]]` "
+        "format for clickable links to specific lines or ranges\n"
+        "- Keep paragraphs focused on single topics (one concern = one paragraph)\n"
+        "- Use `> blockquotes` for key findings or warnings that deserve attention\n\n"
+        "## CONTEXT PARAMETER\n\n"
+        "Always provide a clear context string describing what the user is reviewing:\n"
+        "- ✅ 'Phase 2 Complete: API Integration Summary'\n"
+        "- ✅ 'PR #1234: Authentication Refactor Review'\n"
+        "- ✅ 'Implementation Plan: Cache Strategy Options'\n"
+        "- ❌ 'Review' (too vague)\n"
+        "- ❌ 'Summary' (lacks specificity)\n\n"
+        "## EXAMPLE TRIGGER SCENARIOS\n\n"
+        "| User Request | Action |\n"
+        "|--------------|--------|\n"
+        "| 'Review this PR' | USE REDLINE - code review analysis |\n"
+        "| 'What does this function do?' | NO - simple explanation |\n"
+        "| 'Analyze the performance implications' | USE REDLINE - technical analysis |\n"
+        "| 'Is this approach correct?' | DEPENDS - use if answer is substantive |\n"
+        "| 'Create a summary of changes' | USE REDLINE - deliverable document |\n"
+        "| 'Help me understand X' | NO - educational response |\n"
+        "| 'What are the risks?' | USE REDLINE - analysis with findings |"
+    ),
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "markdown_spec": {
+                "type": "string",
+                "description": (
+                    "The markdown document to review. Use code references [[file:path:line]] "
+                    "to link to specific code. Examples:\n"
+                    "- [[file:src/auth.py:42]] - links to line 42\n"
+                    "- [[file:src/auth.py:42-50]] - links to lines 42-50\n"
+                    "- [[file:README.md]] - links to entire file\n"
+                    "These become clickable buttons that open a code viewer panel."
+                ),
+            },
+            "context": {
+                "type": "string",
+                "description": "What to review. Examples: 'Implementation plan for feature X', 'Phase 1 completion summary', 'Architecture decision'",
+            },
+            "base_dir": {
+                "type": "string",
+                "description": "Base directory for resolving file references. Defaults to current working directory.",
+            },
+        },
+        "required": ["markdown_spec"],
+    },
+)
+
+
 @mcp_server.list_tools()
 async def list_tools() -> list[Tool]:
     """Return the list of tools available from this MCP server.
@@ -469,100 +1114,42 @@ async def list_tools() -> list[Tool]:
     Returns:
         List containing the `request_human_review` tool definition.
     """
-    return [
-        Tool(
-            name="request_human_review",
-            description=(
-                "# Redline Review Tool\n\n"
-                "Request human review via browser interface for interactive feedback with highlighting and comments.\n\n"
-                "## WHEN TO USE THIS TOOL\n\n"
-                "**ALWAYS use this tool when:**\n\n"
-                "1. **Code Reviews & PR Analysis** - When reviewing pull requests, analyzing code changes, or providing "
-                "feedback on implementations. Present your findings so the user can highlight concerns and add comments "
-                "on specific sections.\n\n"
-                "2. **Technical Analysis Deliverables** - When providing substantive technical analysis (architectural "
-                "review, performance analysis, security audit, trade-off analysis) that exceeds 200 words or contains "
-                "multiple distinct findings.\n\n"
-                "3. **Implementation Plans** - Before implementing complex changes, present the plan for approval. User "
-                "can mark sections as approved, needs-revision, or add clarifying questions.\n\n"
-                "4. **Phase Completion Summaries** - After completing a significant phase of work (especially when "
-                "marking 3+ todos as completed), present a walkthrough of what was done for review and sign-off. "
-                "This allows users to review all changes in one structured document with clickable code references.\n\n"
-                "5. **Recommendations with Options** - When presenting multiple approaches or recommendations where the "
-                "user needs to make decisions. They can annotate preferences directly on each option.\n\n"
-                "6. **Explicit Requests** - When user asks for a 'redline', 'redline document', 'review document', "
-                "'present for review', or 'create a document for review'.\n\n"
-                "**DO NOT use this tool for:**\n"
-                "- Simple Q&A responses\n"
-                "- Short clarifications or explanations\n"
-                "- Status updates under 200 words\n"
-                "- Single, straightforward task completions\n"
-                "- When user explicitly asks for inline/chat response\n\n"
-                "## DEFAULT MINDSET\n\n"
-                "**When in doubt, use redline.** It's better to provide interactive review capability for substantial "
-                "content than to present it as plain text. Users can always read it linearly if they prefer, but redline "
-                "gives them the option to highlight sections, add contextual comments, and click through to code. "
-                "Redline makes technical content more actionable.\n\n"
-                "## FORMATTING BEST PRACTICES\n\n"
-                "Structure your markdown for easy annotation:\n"
-                "- Use clear **## Section Headers** so users can comment on specific sections\n"
-                "- Use **numbered lists** for recommendations/findings (easier to reference: 'I disagree with point 3')\n"
-                "- Use **tables** for comparisons and trade-offs\n"
-                "- Include **code references** using `[[file:path/to/file.py:42]]` or `[[file:path/to/file.py:42-50]]` "
-                "format for clickable links to specific lines or ranges\n"
-                "- Keep paragraphs focused on single topics (one concern = one paragraph)\n"
-                "- Use `> blockquotes` for key findings or warnings that deserve attention\n\n"
-                "## CONTEXT PARAMETER\n\n"
-                "Always provide a clear context string describing what the user is reviewing:\n"
-                "- ✅ 'Phase 2 Complete: API Integration Summary'\n"
-                "- ✅ 'PR #1234: Authentication Refactor Review'\n"
-                "- ✅ 'Implementation Plan: Cache Strategy Options'\n"
-                "- ❌ 'Review' (too vague)\n"
-                "- ❌ 'Summary' (lacks specificity)\n\n"
-                "## EXAMPLE TRIGGER SCENARIOS\n\n"
-                "| User Request | Action |\n"
-                "|--------------|--------|\n"
-                "| 'Review this PR' | USE REDLINE - code review analysis |\n"
-                "| 'What does this function do?' | NO - simple explanation |\n"
-                "| 'Analyze the performance implications' | USE REDLINE - technical analysis |\n"
-                "| 'Is this approach correct?' | DEPENDS - use if answer is substantive |\n"
-                "| 'Create a summary of changes' | USE REDLINE - deliverable document |\n"
-                "| 'Help me understand X' | NO - educational response |\n"
-                "| 'What are the risks?' | USE REDLINE - analysis with findings |"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "markdown_spec": {
-                        "type": "string",
-                        "description": (
-                            "The markdown document to review. Use code references [[file:path:line]] "
-                            "to link to specific code. Examples:\n"
-                            "- [[file:src/auth.py:42]] - links to line 42\n"
-                            "- [[file:src/auth.py:42-50]] - links to lines 42-50\n"
-                            "- [[file:README.md]] - links to entire file\n"
-                            "These become clickable buttons that open a code viewer panel."
-                        ),
-                    },
-                    "context": {
-                        "type": "string",
-                        "description": "What to review. Examples: 'Implementation plan for feature X', 'Phase 1 completion summary', 'Architecture decision'",
-                    },
-                    "base_dir": {
-                        "type": "string",
-                        "description": "Base directory for resolving file references. Defaults to current working directory.",
-                    },
-                },
-                "required": ["markdown_spec"],
-            },
-        )
-    ]
+    return [REQUEST_HUMAN_REVIEW_TOOL]
 
 
 # Time window (in seconds) to consider a pending review as valid
 PENDING_REVIEW_WINDOW = 5 * 60  # 5 minutes
 
 
+def _review_timeout_from_env() -> float | None:
+    """Read the review wait cap from REDLINE_REVIEW_TIMEOUT_SECONDS.
+
+    Returns:
+        Timeout in seconds, or None (wait indefinitely) if unset, invalid,
+        or not positive
+    """
+    value = os.environ.get("REDLINE_REVIEW_TIMEOUT_SECONDS", "").strip()
+    if not value:
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid REDLINE_REVIEW_TIMEOUT_SECONDS: {value!r}")
+        return None
+    return timeout if timeout > 0 else None
+
+
+# Maximum time to wait for a review (None = no timeout, e.g. 3600 for 1 hour)
+REVIEW_TIMEOUT = _review_timeout_from_env()
+
+
+def _tool_result(payload: dict[str, Any]) -> list[TextContent]:
+    """Encode a tool result as indented JSON text for the agent (UTF-8, not \\u-escaped)."""
+    return [
+        TextContent(type="text", text=orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode())
+    ]
+
+
 @mcp_server.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     """Handle MCP tool invocations from Claude.
@@ -603,7 +1190,7 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             # Clear the pending review
             app_state["pending_review"] = None
             app_state["pending_review_time"] = None
-            return [TextContent(type="text", text=json.dumps(pending_review, indent=2))]
+            return _tool_result(pending_review)
         else:
             logger.info(f"Pending review is too old ({age:.1f}s), ignoring")
             app_state["pending_review"] = None
@@ -613,47 +1200,78 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     app_state["content"] = markdown_spec
     app_state["base_dir"] = base_dir
 
-    # Parse git diff for the base directory
-    app_state["diff_data"] = parse_git_diff(base_dir)
+    # Parse git diff for the base directory, off the event loop so the MCP
+    # stdio transport keeps being served while git runs
+    app_state["diff_data"] = await asyncio.to_thread(parse_git_diff, base_dir)
     logger.info(f"Parsed diff data for {len(app_state['diff_data'])} files")
 
     # Create a new future to wait for the review
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     future: asyncio.Future[Any] = loop.create_future()
     app_state["future"] = future
-    app_state["loop"] = loop  # Store loop for thread-safe resolution
 
-    # Start HTTP server if not running (returns the allocated port)
-    port = start_http_server_if_needed()
+    # Only now tell an open tab: it refetches the diff for the new content
+    # and may submit straight away
+    notify_content_updated()
 
-    # Open browser to the review interface
+    # HTTP server is pre-warmed by async_main; restart it if it is not running
+    port = await start_http_server_if_needed()
+
+    # Open browser to the review interface, unless a tab left open by an
+    # interrupted call is still reviewing; it was just sent the new content
     url = f"http://localhost:{port}"
-    logger.info(f"Opening browser to {url}")
-    try:
-        webbrowser.open(url)
-    except Exception as e:
-        logger.error(f"Failed to open browser: {e}")
+    if app_state["ui_streams"]:
+        logger.info(f"Review UI already open at {url}, showing the new content there")
+    else:
+        logger.info(f"Opening browser to {url}")
+        try:
+            webbrowser.open(url)
+        except Exception as e:
+            logger.error(f"Failed to open browser: {e}")
 
-    # Wait indefinitely for the user to submit their review (no timeout)
-    logger.info("Waiting for user review (no timeout - take as long as you need)...")
-    result = await future
+    # Wait for the user to submit their review (indefinitely unless configured)
+    if REVIEW_TIMEOUT is None:
+        logger.info("Waiting for user review (no timeout - take as long as you need)...")
+    else:
+        logger.info(f"Waiting for user review (timeout: {REVIEW_TIMEOUT:g}s)...")
+    try:
+        result = await asyncio.wait_for(future, timeout=REVIEW_TIMEOUT)
+    except TimeoutError:
+        # A late submission is still kept as pending_review for the next call
+        logger.warning("Timed out waiting for user review")
+        return _tool_result({"status": "timeout"})
 
     logger.info("Review received!")
 
     # Return the structured feedback
-    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+    return _tool_result(result)
 
 
 async def async_main() -> None:
     """Main async entry point for the MCP server.
 
-    Establishes stdio communication with Claude and runs the MCP server
-    until the connection is closed or an error occurs.
+    Starts the HTTP server, then establishes stdio communication with
+    Claude and runs the MCP server until the connection is closed or an
+    error occurs.
     """
     logger.info("Starting Redline MCP Server")
 
-    async with stdio_server() as (read_stream, write_stream):
-        await mcp_server.run(read_stream, write_stream, mcp_server.create_initialization_options())
+    # Pre-warm the HTTP server alongside the MCP handshake so the first
+    # review opens without waiting for it; call_tool only restarts it if the
+    # task has exited
+    prewarm = asyncio.create_task(start_http_server_if_needed())
+
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await mcp_server.run(
+                read_stream, write_stream, mcp_server.create_initialization_options()
+            )
+    finally:
+        # A failed pre-warm only matters to reviews, which retry the start;
+        # it must not keep the server from being stopped
+        with suppress(Exception):
+            await prewarm
+        await stop_http_server()
 
 
 def create_argument_parser() -> argparse.ArgumentParser:
@@ -696,6 +1314,20 @@ Available themes:
     return parser
 
 
+def _event_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Pick the event loop shared by the MCP and HTTP servers.
+
+    Returns:
+        uvloop's loop constructor when installed, or None for asyncio's
+        default loop
+    """
+    if HTTP_LOOP != "uvloop":
+        return None
+    import uvloop
+
+    return uvloop.new_event_loop
+
+
 def main() -> None:
     """Main entry point for the Redline MCP server.
 
@@ -726,7 +1358,7 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        asyncio.run(async_main())
+        asyncio.run(async_main(), loop_factory=_event_loop_factory())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -16,6 +16,9 @@ Example:
 
 from __future__ import annotations
 
+from collections.abc import Mapping
+from functools import cache
+from types import MappingProxyType
 from typing import TypedDict
 
 
@@ -293,6 +296,9 @@ THEMES: dict[str, ThemeDefinition] = {
 # Default theme name
 DEFAULT_THEME_NAME = "dark"
 
+# Registry keys are lowercase, so THEMES doubles as the case-insensitive index
+_AVAILABLE_THEMES = ", ".join(sorted(THEMES))
+
 
 def get_theme(name: str) -> ThemeDefinition:
     """Get a theme by name.
@@ -306,26 +312,29 @@ def get_theme(name: str) -> ThemeDefinition:
     Raises:
         ValueError: If theme name is not found
     """
-    name_lower = name.lower()
-    if name_lower not in THEMES:
-        available = ", ".join(sorted(THEMES.keys()))
-        raise ValueError(f"Unknown theme '{name}'. Available themes: {available}")
-    return THEMES[name_lower]
+    try:
+        return THEMES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown theme '{name}'. Available themes: {_AVAILABLE_THEMES}") from None
 
 
-def list_themes() -> list[str]:
+@cache
+def list_themes() -> tuple[str, ...]:
     """Get list of available theme names.
 
+    Themes are fixed at import time, so the result is computed once.
+
     Returns:
-        Sorted list of theme names
+        Sorted tuple of theme names
     """
-    return sorted(THEMES.keys())
+    return tuple(sorted(THEMES.keys()))
 
 
-def get_theme_descriptions() -> dict[str, str]:
+@cache
+def get_theme_descriptions() -> Mapping[str, str]:
     """Get descriptions for all themes.
 
     Returns:
-        Dict mapping theme name to description
+        Read-only mapping of theme name to description, computed once
     """
-    return {name: theme["description"] for name, theme in THEMES.items()}
+    return MappingProxyType({name: theme["description"] for name, theme in THEMES.items()})
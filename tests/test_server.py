@@ -1,220 +1,365 @@
 """Tests for the Redline MCP server."""
 
 import asyncio
+import concurrent.futures
+import gzip
+import json
+import os
+import re
+import subprocess
+import threading
 import time
+from collections.abc import Iterator
+from pathlib import Path
 from typing import Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
+import pytest_asyncio
+from fastapi import Request
 from fastapi.testclient import TestClient
 
+import redline.server
 from redline.server import (
+    HTTP_LOOP,
+    HTTP_PARSER,
+    REQUEST_HUMAN_REVIEW_TOOL,
+    _compress_asset,
+    _event_loop_factory,
+    _load_static_assets,
+    _review_timeout_from_env,
     app,
     app_state,
+    async_main,
     call_tool,
+    expand_line_ranges,
     get_config,
     get_content,
     get_diff,
     get_file,
     list_tools,
+    notify_content_updated,
     parse_git_diff,
     run_http_server,
     start_http_server_if_needed,
+    stop_http_server,
+    stream_events,
     submit_review,
 )
 from redline.themes import (
     DEFAULT_THEME_NAME,
-    get_theme,
-    get_theme_descriptions,
     list_themes,
 )
 
+# Tests here share the module-level app_state, so xdist keeps them on one worker
+pytestmark = pytest.mark.xdist_group(name="redline_server")
+
+# Immutable app_state values every test starts from
+DEFAULT_APP_STATE: dict[str, Any] = {
+    "content": "",
+    "future": None,
+    "theme": DEFAULT_THEME_NAME,
+    "base_dir": None,
+    "pending_review": None,
+    "pending_review_time": None,
+    "http_port": None,
+    "http_socket": None,
+    "http_loop": None,
+    "content_event": None,
+}
+
+# A review with one inline comment, as the UI submits it; tests must not mutate it
+COMMENT_PAYLOAD: dict[str, Any] = {
+    "comments": [
+        {
+            "id": "123",
+            "quote": "test",
+            "full_line_text": "this is a test line",
+            "user_comment": "needs clarification",
+            "timestamp": 1234567890,
+        }
+    ],
+    "user_overall_comment": "Overall good",
+}
 
-@pytest.fixture
-def client() -> TestClient:
-    """Create a test client."""
-    return TestClient(app)
+# Every registered theme is listed in the theme metadata the server returns
+EXPECTED_THEME_COUNT = len(list_themes())
+
+# Error message for calls to tools the server does not provide
+UNKNOWN_TOOL_RE = re.compile("Unknown tool")
+
+
+def signal_server_start(mock_start_server: AsyncMock, port: int = 6380) -> asyncio.Event:
+    """Make a start_http_server_if_needed mock set an event when call_tool awaits it.
+
+    call_tool installs the review future just before starting the server, so
+    once the event is set a test can resolve app_state["future"].
+    """
+    started = asyncio.Event()
+
+    def start() -> int:
+        started.set()
+        return port
+
+    mock_start_server.side_effect = start
+    return started
+
+
+@pytest.fixture(scope="session")
+def http_server_start() -> Iterator[AsyncMock]:
+    """Replace the HTTP server start call_tool makes, once for the whole session.
+
+    TestHTTPServerManagement calls start_http_server_if_needed through its
+    own import, so it still exercises the real function.
+    """
+    with patch("redline.server.start_http_server_if_needed", new_callable=AsyncMock) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_start_server(http_server_start: AsyncMock) -> AsyncMock:
+    """Hand each test the session's server start mock with no calls or behaviour left over."""
+    http_server_start.reset_mock(return_value=True, side_effect=True)
+    return http_server_start
+
+
+@pytest.fixture(autouse=True)
+def mock_browser(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Keep call_tool from opening real browser windows."""
+    mock_open = MagicMock()
+    monkeypatch.setattr("redline.server.webbrowser.open", mock_open)
+    return mock_open
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    """Create a test client shared by all tests; reset_app_state isolates them.
+
+    Entering the client runs the app lifespan once, as a started server would.
+    """
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def async_client() -> Iterator[httpx.AsyncClient]:
+    """Create an async client that calls the app in the test's own task.
+
+    Async GET tests use it to skip the TestClient's thread hop; the app holds
+    no per-loop state, so one client serves every test's loop.
+    """
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield http
+    asyncio.run(http.aclose())
+
+
+@pytest_asyncio.fixture
+async def review_future() -> asyncio.Future[Any]:
+    """Install a fresh review future on the test's loop, as call_tool does."""
+    future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+    app_state["future"] = future
+    return future
 
 
 @pytest.fixture(autouse=True)
 def reset_app_state() -> None:
     """Reset app state before each test."""
-    app_state["content"] = ""
-    app_state["future"] = None
-    app_state["loop"] = None
-    app_state["theme"] = DEFAULT_THEME_NAME
-    app_state["base_dir"] = None
+    app_state.update(DEFAULT_APP_STATE)
+    # Containers tests mutate in place get fresh instances
     app_state["diff_data"] = {}
-    app_state["pending_review"] = None
-    app_state["pending_review_time"] = None
-    app_state["http_port"] = None
-
-
-class TestThemes:
-    """Tests for theme functionality."""
-
-    def test_list_themes(self) -> None:
-        """Test listing available themes."""
-        themes = list_themes()
-        assert "clean" in themes
-        assert "dark" in themes
-        assert "forest" in themes
-        assert "ocean" in themes
-        assert "sunset" in themes
-        assert "minimal" in themes
-        assert len(themes) == 6
-
-    def test_get_theme_clean(self) -> None:
-        """Test getting the clean theme."""
-        theme = get_theme("clean")
-        assert theme["name"] == "clean"
-        assert "description" in theme
-        assert "colors" in theme
-        assert "bg_page" in theme["colors"]
-        assert "accent_primary" in theme["colors"]
-
-    def test_get_theme_dark(self) -> None:
-        """Test getting the dark theme."""
-        theme = get_theme("dark")
-        assert theme["name"] == "dark"
-        assert theme["colors"]["bg_page"] == "#0f172a"
-
-    def test_get_theme_case_insensitive(self) -> None:
-        """Test that theme names are case-insensitive."""
-        theme1 = get_theme("DARK")
-        theme2 = get_theme("Dark")
-        theme3 = get_theme("dark")
-        assert theme1 == theme2 == theme3
-
-    def test_get_theme_invalid(self) -> None:
-        """Test getting an invalid theme raises ValueError."""
-        with pytest.raises(ValueError, match="Unknown theme"):
-            get_theme("nonexistent")
-
-    def test_get_theme_descriptions(self) -> None:
-        """Test getting theme descriptions."""
-        descriptions = get_theme_descriptions()
-        assert len(descriptions) == 6
-        assert "clean" in descriptions
-        assert "professional" in descriptions["clean"].lower()
-
-    def test_all_themes_have_required_colors(self) -> None:
-        """Test that all themes have all required color keys."""
-        required_colors = [
-            "bg_page", "bg_card", "bg_card_hover", "bg_input", "bg_code",
-            "bg_highlight", "bg_highlight_hover", "text_primary", "text_secondary",
-            "text_muted", "text_inverse", "accent_primary", "accent_primary_hover",
-            "accent_secondary", "accent_success", "accent_error", "accent_warning",
-            "border_default", "border_light", "border_accent",
-            "shadow_sm", "shadow_md", "shadow_lg",
-        ]
-        for theme_name in list_themes():
-            theme = get_theme(theme_name)
-            for color_key in required_colors:
-                assert color_key in theme["colors"], (
-                    f"Theme '{theme_name}' missing color '{color_key}'"
-                )
+    app_state["ui_streams"] = set()
+    # No HTTP server survives from a previous test
+    redline.server.http_server = None
+    redline.server.http_server_task = None
+    redline.server.http_server_ready = None
 
 
 class TestConfigEndpoint:
     """Tests for the /api/config endpoint."""
 
-    def test_get_config_default_theme(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_config_default_theme(self) -> None:
         """Test getting config with default theme (dark)."""
-        response = client.get("/api/config")
+        response = await get_config()
         assert response.status_code == 200
-        data = response.json()
+        data = json.loads(response.body)
         assert "theme" in data
         assert data["theme"]["name"] == "dark"
         assert "available_themes" in data
-        assert len(data["available_themes"]) == 6
+        assert len(data["available_themes"]) == EXPECTED_THEME_COUNT
 
-    def test_get_config_with_custom_theme(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_config_with_custom_theme(self) -> None:
         """Test getting config with a custom theme set."""
-        app_state["theme"] = "dark"
-        response = client.get("/api/config")
+        app_state["theme"] = "forest"
+        response = await get_config()
         assert response.status_code == 200
-        data = response.json()
-        assert data["theme"]["name"] == "dark"
+        assert json.loads(response.body)["theme"]["name"] == "forest"
 
+    @pytest.mark.asyncio
     async def test_get_config_returns_json_response(self) -> None:
         """Test that get_config returns proper JSONResponse."""
         result = await get_config()
         assert hasattr(result, "status_code")
         assert result.status_code == 200
 
+    @pytest.mark.asyncio
+    async def test_no_cors_headers_by_default(self, async_client: httpx.AsyncClient) -> None:
+        """Test that cross-origin access is not granted outside dev mode."""
+        response = await async_client.get("/api/config", headers={"Origin": "https://example.com"})
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
+
 
 class TestAPIEndpoints:
     """Tests for FastAPI endpoints."""
 
-    def test_get_content_empty(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_content_empty(self) -> None:
         """Test getting content when empty."""
-        response = client.get("/api/content")
+        response = await get_content(Request({"type": "http", "headers": []}))
         assert response.status_code == 200
-        assert response.json() == {"content": ""}
+        assert json.loads(response.body) == {"content": ""}
 
-    def test_get_content_with_data(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_content_with_data(self) -> None:
         """Test getting content when data exists."""
         app_state["content"] = "# Test Document"
-        response = client.get("/api/content")
+        response = await get_content(Request({"type": "http", "headers": []}))
         assert response.status_code == 200
-        assert response.json() == {"content": "# Test Document"}
+        assert json.loads(response.body) == {"content": "# Test Document"}
 
-    def test_submit_review_lgtm(self, client: TestClient) -> None:
-        """Test submitting a review with LGTM and no comments."""
-        # Create a future to be resolved
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
+    @pytest.mark.asyncio
+    async def test_get_content_revalidates_with_etag(self, async_client: httpx.AsyncClient) -> None:
+        """Test that repeat polls with a matching ETag get an empty 304."""
+        app_state["content"] = "# Test Document"
+        etag = (await async_client.get("/api/content")).headers["etag"]
 
+        response = await async_client.get("/api/content", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        app_state["content"] = "# Changed"
+        response = await async_client.get("/api/content", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json() == {"content": "# Changed"}
+
+    @pytest.mark.asyncio
+    async def test_stream_events_pushes_content_updates(self) -> None:
+        """Test that /api/events sends a snapshot and then each content update."""
+        app_state["content"] = "# First"
+        response = await stream_events()
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+
+        assert await anext(body) == b'event: snapshot\ndata: {"content":"# First"}\n\n'
+
+        app_state["content"] = "# Second"
+        notify_content_updated()
+        update = await asyncio.wait_for(anext(body), timeout=1)
+        assert update == b'event: content-updated\ndata: {"content":"# Second"}\n\n'
+        await body.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_events_tracks_open_review_tabs(
+        self, async_client: httpx.AsyncClient
+    ) -> None:
+        """Test that a stream counts as an open tab until it closes or a review is submitted."""
+        first = (await stream_events()).body_iterator
+        await anext(first)
+        assert len(app_state["ui_streams"]) == 1
+        await first.aclose()
+        assert app_state["ui_streams"] == set()
+
+        second = (await stream_events()).body_iterator
+        await anext(second)
+        await async_client.post(
+            "/api/submit", json={"comments": [], "user_overall_comment": "LGTM"}
+        )
+        assert app_state["ui_streams"] == set()
+        await second.aclose()
+
+    @pytest.mark.asyncio
+    async def test_submit_review_lgtm(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
+        """Test submitting a review with LGTM and no comments."""
         payload = {"comments": [], "user_overall_comment": "LGTM"}
 
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
-        assert future.done()
-        assert future.result() == payload
-
-        loop.close()
+        assert await asyncio.wait_for(review_future, timeout=1) == payload
 
-    def test_submit_review_with_comments(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_with_comments(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
         """Test submitting a review with inline comments."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
-
-        payload = {
-            "comments": [
-                {
-                    "id": "123",
-                    "quote": "test",
-                    "full_line_text": "this is a test line",
-                    "user_comment": "needs clarification",
-                    "timestamp": 1234567890,
-                }
-            ],
-            "user_overall_comment": "Overall good",
-        }
-
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=COMMENT_PAYLOAD)
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
-        assert future.done()
-        assert future.result() == payload
+        assert await asyncio.wait_for(review_future, timeout=1) == COMMENT_PAYLOAD
 
-        loop.close()
-
-    def test_submit_review_no_future(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_no_future(self) -> None:
         """Test submitting when no future exists."""
-        payload = {"comments": [], "user_overall_comment": None}
-        response = client.post("/api/submit", json=payload)
+        response = await submit_review({"comments": [], "user_overall_comment": None})
         assert response.status_code == 200
-        assert response.json() == {"status": "ok"}
+        assert json.loads(response.body) == {"status": "ok"}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("payload", "message"),
+        [
+            (
+                {"user_overall_comment": "LGTM"},
+                "Review submitted: LGTM (approved with no comments)",
+            ),
+            (
+                {"comments": [], "user_overall_comment": None},
+                "Review submitted: Approved with no comments",
+            ),
+            (
+                {"comments": [{"id": "1"}], "user_overall_comment": "Nice"},
+                "Review submitted with 1 inline comments and overall comment: 'Nice'",
+            ),
+            ({"comments": [{"id": "1"}, {"id": "2"}]}, "Review submitted with 2 inline comments"),
+        ],
+    )
+    async def test_submit_review_logs_summary(
+        self,
+        async_client: httpx.AsyncClient,
+        caplog: pytest.LogCaptureFixture,
+        payload: dict[str, Any],
+        message: str,
+    ) -> None:
+        """Test that each kind of submission is summarized in the log."""
+        with caplog.at_level("INFO", logger="redline.server"):
+            await async_client.post("/api/submit", json=payload)
+        assert message in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_submit_review_after_tool_call_cancelled(self) -> None:
+        """Test that a review arriving after cancellation is stored but not delivered."""
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        app_state["future"] = future
+
+        await submit_review({"comments": [], "user_overall_comment": "LGTM"})
+        # The tool call is cancelled before the loop runs the scheduled result
+        future.cancel()
+        await asyncio.sleep(0)
+
+        assert future.cancelled()
+        assert app_state["pending_review"] == {"comments": [], "user_overall_comment": "LGTM"}
 
 
 class TestMCPTools:
     """Tests for MCP tool functionality."""
 
+    @pytest.mark.asyncio
     async def test_list_tools(self) -> None:
         """Test listing available tools."""
         tools = await list_tools()
@@ -223,31 +368,23 @@ class TestMCPTools:
         assert "Redline Review Tool" in tools[0].description
         assert "markdown_spec" in tools[0].inputSchema["properties"]
 
-    @patch("redline.server.webbrowser.open")
-    @patch("redline.server.start_http_server_if_needed")
+    @pytest.mark.asyncio
+    async def test_list_tools_reuses_tool_definition(self) -> None:
+        """Test that the tool definition is built once, not per request."""
+        assert (await list_tools())[0] is REQUEST_HUMAN_REVIEW_TOOL
+        assert (await list_tools())[0] is REQUEST_HUMAN_REVIEW_TOOL
+
+    @pytest.mark.asyncio
     async def test_call_tool_request_human_review(
-        self, mock_start_server: MagicMock, mock_browser: MagicMock
+        self, mock_browser: MagicMock, mock_start_server: AsyncMock
     ) -> None:
         """Test calling the request_human_review tool."""
         # Mock returns a dynamic port
-        mock_start_server.return_value = 54321
+        started = signal_server_start(mock_start_server, port=54321)
 
         markdown_spec = "# Test Document\nThis is a test."
         context = "Please review this"
 
-        result_data = {
-            "comments": [
-                {
-                    "id": "1",
-                    "quote": "test",
-                    "full_line_text": "This is a test.",
-                    "user_comment": "LGTM",
-                    "timestamp": 123456,
-                }
-            ],
-            "user_overall_comment": "Approved",
-        }
-
         # Create an async function to simulate the tool call
         async def run_tool() -> Any:
             return await call_tool(
@@ -258,13 +395,13 @@ class TestMCPTools:
         # Start the tool call
         task = asyncio.create_task(run_tool())
 
-        # Wait briefly for setup
-        await asyncio.sleep(0.05)
+        # Wait until the review future is installed (after the diff is parsed)
+        await asyncio.wait_for(started.wait(), timeout=2)
 
         # Resolve the future
         future = app_state.get("future")
         assert isinstance(future, asyncio.Future)
-        future.set_result(result_data)
+        future.set_result(COMMENT_PAYLOAD)
 
         # Get the result
         result = await task
@@ -272,8 +409,7 @@ class TestMCPTools:
         # Verify the result
         assert len(result) == 1
         assert result[0].type == "text"
-        assert "comments" in result[0].text
-        assert "Approved" in result[0].text
+        assert json.loads(result[0].text) == COMMENT_PAYLOAD
 
         # Verify browser was opened with dynamic port
         mock_browser.assert_called_once_with("http://localhost:54321")
@@ -284,56 +420,339 @@ class TestMCPTools:
         # Verify content was set
         assert app_state["content"] == markdown_spec
 
+    @pytest.mark.asyncio
     async def test_call_tool_invalid_name(self) -> None:
         """Test calling a tool with invalid name."""
-        with pytest.raises(ValueError, match="Unknown tool"):
+        with pytest.raises(ValueError, match=UNKNOWN_TOOL_RE):
             await call_tool("invalid_tool", {})
 
+    @pytest.mark.asyncio
+    @patch("redline.server.REVIEW_TIMEOUT", 0.05)
+    @patch("redline.server.parse_git_diff", return_value={})
+    async def test_call_tool_review_timeout(self, mock_parse_diff: MagicMock) -> None:
+        """Test that a configured timeout ends the wait with a timeout status."""
+        result = await call_tool("request_human_review", {"markdown_spec": "# Test"})
+
+        assert json.loads(result[0].text) == {"status": "timeout"}
+        assert app_state["future"].cancelled()
+
+    @pytest.mark.asyncio
+    @patch("redline.server.REVIEW_TIMEOUT", 0.05)
+    @patch("redline.server.parse_git_diff", return_value={})
+    async def test_call_tool_reuses_open_review_tab(
+        self, mock_parse_diff: MagicMock, mock_browser: MagicMock, mock_start_server: AsyncMock
+    ) -> None:
+        """Test that no new browser window opens while a tab is still reviewing."""
+        mock_start_server.return_value = 54321
+        app_state["ui_streams"] = {object()}
+        await call_tool("request_human_review", {"markdown_spec": "# Test"})
+        mock_browser.assert_not_called()
+
+        app_state["ui_streams"] = set()
+        await call_tool("request_human_review", {"markdown_spec": "# Test"})
+        mock_browser.assert_called_once_with("http://localhost:54321")
+
+    @pytest.mark.asyncio
+    @patch("redline.server.REVIEW_TIMEOUT", 0.05)
+    @patch("redline.server.parse_git_diff", return_value={"a.py": {}})
+    async def test_call_tool_notifies_after_state_is_ready(
+        self, mock_parse_diff: MagicMock
+    ) -> None:
+        """Test that open tabs are told about new content only once its diff is set."""
+        seen: list[tuple[Any, Any]] = []
+
+        def record() -> None:
+            seen.append((app_state["diff_data"], app_state["future"]))
+
+        app_state["diff_data"] = {"stale.py": {}}
+        with patch("redline.server.notify_content_updated", side_effect=record):
+            await call_tool("request_human_review", {"markdown_spec": "# Test"})
+
+        assert seen == [({"a.py": {}}, app_state["future"])]
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [(None, None), ("3600", 3600.0), ("0", None), ("soon", None)],
+    )
+    def test_review_timeout_from_env(
+        self, monkeypatch: pytest.MonkeyPatch, value: str | None, expected: float | None
+    ) -> None:
+        """Test parsing of REDLINE_REVIEW_TIMEOUT_SECONDS."""
+        if value is None:
+            monkeypatch.delenv("REDLINE_REVIEW_TIMEOUT_SECONDS", raising=False)
+        else:
+            monkeypatch.setenv("REDLINE_REVIEW_TIMEOUT_SECONDS", value)
+
+        assert _review_timeout_from_env() == expected
+
 
 class TestHTTPServerManagement:
-    """Tests for HTTP server thread management."""
+    """Tests for HTTP server task management."""
 
-    def test_run_http_server_error_handling(self) -> None:
+    @pytest.mark.asyncio
+    async def test_run_http_server_error_handling(self) -> None:
         """Test that run_http_server handles exceptions."""
         with patch("redline.server.uvicorn.Server") as mock_server:
             mock_instance = MagicMock()
-            mock_instance.run.side_effect = Exception("Test error")
+            mock_instance.serve.side_effect = Exception("Test error")
             mock_server.return_value = mock_instance
 
             # Should not raise, just log
-            run_http_server()
+            await run_http_server()
 
-    @patch("redline.server.threading.Thread")
-    def test_start_http_server_if_needed_starts_new_thread(
-        self, mock_thread_class: MagicMock
+    @pytest.mark.asyncio
+    @patch("redline.server.uvicorn.Server")
+    @patch("redline.server.uvicorn.Config")
+    async def test_run_http_server_uses_fast_parser(
+        self, mock_config: MagicMock, mock_server: MagicMock
+    ) -> None:
+        """Test that uvicorn is configured with the detected HTTP parser."""
+        mock_server.return_value.serve = AsyncMock()
+        await run_http_server()
+
+        kwargs = mock_config.call_args.kwargs
+        # The loop is the caller's; HTTP_LOOP only picks it in main()
+        assert "loop" not in kwargs
+        assert kwargs["http"] == HTTP_PARSER
+        assert HTTP_PARSER in ("httptools", "h11")
+
+    @pytest.mark.asyncio
+    @patch("redline.server.uvicorn.Server")
+    @patch("redline.server.uvicorn.Config")
+    async def test_run_http_server_disables_unused_features(
+        self, mock_config: MagicMock, mock_server: MagicMock
+    ) -> None:
+        """Test that websockets and per-response headers are turned off."""
+        mock_server.return_value.serve = AsyncMock()
+        await run_http_server()
+
+        kwargs = mock_config.call_args.kwargs
+        assert kwargs["ws"] == "none"
+        assert kwargs["server_header"] is False
+        assert kwargs["date_header"] is False
+
+    @pytest.mark.asyncio
+    @patch("redline.server.uvicorn.Server")
+    @patch("redline.server.uvicorn.Config")
+    async def test_run_http_server_tunes_connections(
+        self, mock_config: MagicMock, mock_server: MagicMock
+    ) -> None:
+        """Test that idle keep-alive connections outlive pauses between UI actions."""
+        mock_server.return_value.serve = AsyncMock()
+        await run_http_server()
+
+        kwargs = mock_config.call_args.kwargs
+        assert kwargs["timeout_keep_alive"] == 75
+        assert kwargs["limit_concurrency"] == 64
+
+    @pytest.mark.asyncio
+    @patch("redline.server.uvicorn.Server")
+    @patch("redline.server.uvicorn.Config")
+    async def test_run_http_server_serves_bound_socket(
+        self, mock_config: MagicMock, mock_server: MagicMock
+    ) -> None:
+        """Test that uvicorn serves the pre-bound socket instead of rebinding."""
+        sock = MagicMock()
+        app_state["http_socket"] = sock
+        mock_server.return_value.serve = AsyncMock()
+        await run_http_server()
+
+        mock_server.return_value.serve.assert_awaited_once_with(sockets=[sock])
+
+    @pytest.mark.asyncio
+    @patch("redline.server.run_http_server")
+    async def test_start_http_server_if_needed_binds_socket(self, mock_run: AsyncMock) -> None:
+        """Test that the listening socket is bound before the server starts."""
+        # Simulate the lifespan startup completing the handshake
+        mock_run.side_effect = lambda: redline.server.http_server_ready.set_result(0)
+
+        port = await start_http_server_if_needed()
+
+        sock = app_state["http_socket"]
+        try:
+            assert sock.getsockname() == ("127.0.0.1", port)
+            assert app_state["http_port"] == port
+        finally:
+            sock.close()
+
+    @pytest.mark.asyncio
+    @patch("redline.server.run_http_server")
+    async def test_start_http_server_if_needed_starts_task_on_running_loop(
+        self, mock_run: AsyncMock
     ) -> None:
-        """Test starting a new HTTP server thread."""
-        # Mock the thread
-        mock_thread = MagicMock()
-        mock_thread.is_alive.return_value = False
-        mock_thread_class.return_value = mock_thread
+        """Test that the server runs as a task on the caller's event loop."""
+        loops: list[asyncio.AbstractEventLoop] = []
+
+        async def serve() -> None:
+            loops.append(asyncio.get_running_loop())
+            redline.server.http_server_ready.set_result(0)
+            await asyncio.Event().wait()  # serve until cancelled
+
+        mock_run.side_effect = serve
+
+        started = time.perf_counter()
+        await start_http_server_if_needed()
+
+        # The wait ends as soon as the server is ready
+        mock_run.assert_awaited_once()
+        assert loops == [asyncio.get_running_loop()]
+        assert time.perf_counter() - started < 1
+
+        # A live task is reused instead of starting a second server
+        task = redline.server.http_server_task
+        assert task is not None
+        await start_http_server_if_needed()
+        assert redline.server.http_server_task is task
+        task.cancel()
+        app_state["http_socket"].close()
+
+    @pytest.mark.asyncio
+    @patch("redline.server.run_http_server")
+    async def test_start_http_server_if_needed_startup_error(self, mock_run: AsyncMock) -> None:
+        """Test that a failed startup ends the wait instead of timing out."""
+        mock_run.side_effect = lambda: redline.server.http_server_ready.set_exception(
+            OSError("boom")
+        )
 
-        # Patch the global
-        import redline.server
+        started = time.perf_counter()
+        port = await start_http_server_if_needed()
 
-        redline.server.http_server_thread = None
+        assert port == app_state["http_port"]
+        assert time.perf_counter() - started < 1
+        app_state["http_socket"].close()
 
-        with patch("redline.server.http_server_started") as mock_event:
-            start_http_server_if_needed()
+    @pytest.mark.asyncio
+    async def test_run_http_server_reports_startup_failure(self) -> None:
+        """Test that run_http_server fails the handshake when uvicorn errors."""
+        ready = redline.server.http_server_ready = concurrent.futures.Future()
+        with patch("redline.server.uvicorn.Server") as mock_server:
+            mock_server.return_value.serve.side_effect = OSError("boom")
+            await run_http_server()
+
+        with pytest.raises(OSError, match="boom"):
+            ready.result(timeout=0)
+        assert redline.server.http_server_ready is None
+
+    @pytest.mark.asyncio
+    async def test_http_server_round_trip_on_one_loop(self) -> None:
+        """Test serving a submit on the tool call's loop, then stopping cleanly."""
+        port = await start_http_server_if_needed()
+        task = redline.server.http_server_task
+        try:
+            future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+            app_state["future"] = future
+            payload = {"comments": [], "user_overall_comment": "Looks good"}
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as http:
+                response = await http.post("/api/submit", json=payload)
 
-            # Thread should be created
-            mock_thread_class.assert_called_once()
-            mock_thread.start.assert_called_once()
-            mock_event.wait.assert_called_once_with(timeout=5)
+            assert response.status_code == 200
+            assert await asyncio.wait_for(future, timeout=1) == payload
+        finally:
+            await stop_http_server()
+        assert task is not None and task.done()
+        # A stopped server leaves no trace for the next one (or the next test)
+        assert redline.server.http_server is None
+        assert redline.server.http_server_task is None
+        assert redline.server.http_server_ready is None
+
+    @pytest.mark.asyncio
+    async def test_event_streams_outlive_a_stopped_server(self) -> None:
+        """Test that streams opened after a server has stopped keep receiving updates."""
+        await start_http_server_if_needed()
+        await stop_http_server()
+
+        body = (await stream_events()).body_iterator
+        await anext(body)
+        notify_content_updated()
+        update = await asyncio.wait_for(anext(body), timeout=1)
+        assert update.startswith(b"event: content-updated\n")
+        await body.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stop_http_server_ends_open_event_streams(self) -> None:
+        """Test that an open /api/events stream does not hold up shutdown."""
+        port = await start_http_server_if_needed()
+        async with (
+            httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=5) as http,
+            http.stream("GET", "/api/events") as response,
+        ):
+            lines = response.aiter_lines()
+            assert await anext(lines) == "event: snapshot"
+
+            await asyncio.wait_for(stop_http_server(), timeout=2)
+            assert [line async for line in lines] == ['data: {"content":""}', ""]
+
+    def test_event_loop_factory_follows_http_loop(self) -> None:
+        """Test that the MCP loop uses uvloop exactly when the HTTP server does."""
+        with patch("redline.server.HTTP_LOOP", "asyncio"):
+            assert _event_loop_factory() is None
+
+        if HTTP_LOOP == "uvloop":
+            import uvloop
+
+            assert _event_loop_factory() is uvloop.new_event_loop
+
+    @pytest.mark.asyncio
+    async def test_async_main_prewarms_http_server(self) -> None:
+        """Test that the HTTP server warms up alongside the MCP session and stops after it."""
+        calls: list[str] = []
+        http_released = asyncio.Event()
+        stdio = MagicMock()
+        stdio.return_value.__aenter__.return_value = (MagicMock(), MagicMock())
+
+        async def start() -> int:
+            calls.append("http")
+            await http_released.wait()
+            calls.append("http ready")
+            return 0
+
+        async def run(*_: Any) -> None:
+            # The handshake must not wait for the HTTP server to be ready
+            await asyncio.sleep(0)
+            calls.append("mcp")
+            http_released.set()
+
+        with (
+            patch("redline.server.start_http_server_if_needed", side_effect=start),
+            patch("redline.server.stdio_server", stdio),
+            patch.object(redline.server.mcp_server, "run", side_effect=run),
+            patch(
+                "redline.server.stop_http_server",
+                side_effect=lambda: calls.append("stop"),
+            ),
+        ):
+            await asyncio.wait_for(async_main(), timeout=1)
+
+        assert calls == ["http", "mcp", "http ready", "stop"]
+
+    @pytest.mark.asyncio
+    async def test_async_main_stops_http_server_after_failed_prewarm(self) -> None:
+        """Test that a failed HTTP server pre-warm does not skip stopping the server."""
+        stdio = MagicMock()
+        stdio.return_value.__aenter__.return_value = (MagicMock(), MagicMock())
+        stop = AsyncMock()
+
+        with (
+            patch(
+                "redline.server.start_http_server_if_needed",
+                side_effect=RuntimeError("port in use"),
+            ),
+            patch("redline.server.stdio_server", stdio),
+            patch.object(redline.server.mcp_server, "run", AsyncMock()),
+            patch("redline.server.stop_http_server", stop),
+        ):
+            await asyncio.wait_for(async_main(), timeout=1)
+
+        stop.assert_awaited_once()
 
 
 class TestEdgeCases:
     """Tests for edge cases and error conditions."""
 
+    @pytest.mark.asyncio
     async def test_submit_review_with_completed_future(self) -> None:
         """Test submitting when future is already done."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
+        future = asyncio.get_running_loop().create_future()
         future.set_result({"test": "data"})
         app_state["future"] = future
 
@@ -341,11 +760,10 @@ class TestEdgeCases:
         result = await submit_review({"comments": [], "user_overall_comment": None})
         assert result.status_code == 200
 
-        loop.close()
-
+    @pytest.mark.asyncio
     async def test_get_content_returns_json_response(self) -> None:
         """Test that get_content returns proper JSONResponse."""
-        result = await get_content()
+        result = await get_content(Request({"type": "http", "headers": []}))
         assert hasattr(result, "status_code")
         assert result.status_code == 200
 
@@ -361,139 +779,189 @@ class TestEdgeCases:
         assert isinstance(app_state["content"], str)
 
 
+# Files served by the read-only /api/file tests, by extension-detected language
+LANGUAGE_FILES = [
+    ("test.ts", "typescript"),
+    ("test.tsx", "tsx"),
+    ("test.js", "javascript"),
+    ("test.rs", "rust"),
+    ("test.go", "go"),
+    ("test.unknown", "text"),
+]
+
+
+@pytest.fixture(scope="session")
+def file_sandbox(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create a directory of files for /api/file tests that only read."""
+    sandbox = tmp_path_factory.mktemp("file_sandbox")
+    (sandbox / "test.py").write_text("print('hello')\n")
+    (sandbox / "test.bin").write_bytes(b"\x00\x01\x02\xff\xfe")
+    (sandbox / "subdir").mkdir()
+    for filename, _ in LANGUAGE_FILES:
+        (sandbox / filename).write_text("// code\n")
+    return sandbox
+
+
 class TestFileEndpoint:
     """Tests for the /api/file endpoint."""
 
+    @pytest.fixture(autouse=True)
+    def serve_sandbox(self, reset_app_state: None, file_sandbox: Path) -> None:
+        """Serve the shared sandbox unless a test points base_dir elsewhere."""
+        app_state["base_dir"] = str(file_sandbox)
+
     def test_get_file_not_found(self, client: TestClient) -> None:
         """Test getting a file that doesn't exist."""
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-            response = client.get("/api/file?path=nonexistent.py")
-            assert response.status_code == 404
-            assert "not found" in response.json()["error"].lower()
+        response = client.get("/api/file?path=nonexistent.py")
+        assert response.status_code == 404
+        assert "not found" in response.json()["error"].lower()
 
     def test_get_file_success(self, client: TestClient) -> None:
         """Test getting a file successfully."""
-        import os
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-            # Create a test file
-            test_file = os.path.join(tmpdir, "test.py")
-            with open(test_file, "w") as f:
-                f.write("print('hello')\n")
-
-            response = client.get("/api/file?path=test.py")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["content"] == "print('hello')\n"
-            assert data["language"] == "python"
-            assert data["lines"] == 1
-            assert data["path"] == "test.py"
+        response = client.get("/api/file?path=test.py")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["content"] == "print('hello')\n"
+        assert data["language"] == "python"
+        assert data["lines"] == 1
+        assert data["path"] == "test.py"
+
+    @pytest.mark.parametrize(
+        ("text", "lines"),
+        [("", 0), ("one", 1), ("one\n", 1), ("one\ntwo", 2), ("é\nü\n", 2)],
+    )
+    def test_get_file_line_count(
+        self, client: TestClient, tmp_path: Path, text: str, lines: int
+    ) -> None:
+        """Test line counting with and without a trailing newline."""
+        app_state["base_dir"] = str(tmp_path)
+        (tmp_path / "test.txt").write_text(text, encoding="utf-8")
+
+        data = client.get("/api/file?path=test.txt").json()
+        assert data["content"] == text
+        assert data["lines"] == lines
+
+    def test_get_file_large_file_not_cached(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that files above MAX_CACHED_FILE_SIZE bypass the read cache."""
+        app_state["base_dir"] = str(tmp_path)
+        (tmp_path / "big.txt").write_text("x" * 99 + "\n")
+
+        with (
+            patch("redline.server.MAX_CACHED_FILE_SIZE", 50),
+            patch("redline.server._read_file_cached") as mock_cached,
+        ):
+            data = client.get("/api/file?path=big.txt").json()
+
+        mock_cached.assert_not_called()
+        assert data["content"] == "x" * 99 + "\n"
+        assert data["lines"] == 1
+
+    def test_get_file_rereads_modified_file(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that cached file contents are invalidated when the file changes."""
+        app_state["base_dir"] = str(tmp_path)
+        test_file = tmp_path / "test.py"
+        test_file.write_text("a = 1\n")
+        assert client.get("/api/file?path=test.py").json()["content"] == "a = 1\n"
+
+        test_file.write_text("a = 22\nb = 3\n")
+        # Force a different mtime even on filesystems with coarse timestamps
+        st = test_file.stat()
+        os.utime(test_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        data = client.get("/api/file?path=test.py").json()
+        assert data["content"] == "a = 22\nb = 3\n"
+        assert data["lines"] == 2
 
     def test_get_file_path_outside_base_dir(self, client: TestClient) -> None:
         """Test that accessing files outside base_dir is forbidden."""
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-            # Try to access parent directory
-            response = client.get("/api/file?path=../../../etc/passwd")
-            assert response.status_code == 403
-            assert "outside base directory" in response.json()["error"].lower()
+        # Try to access parent directory
+        response = client.get("/api/file?path=../../../etc/passwd")
+        assert response.status_code == 403
+        assert "outside base directory" in response.json()["error"].lower()
+
+    def test_get_file_invalid_path(self, client: TestClient) -> None:
+        """Test that an unresolvable path is rejected as invalid, not forbidden."""
+        response = client.get("/api/file?path=bad%00name.py")
+        assert response.status_code == 400
+        assert "invalid path" in response.json()["error"].lower()
+
+    def test_get_file_sibling_with_shared_prefix(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that a sibling directory sharing base_dir's name prefix is forbidden."""
+        (tmp_path / "project").mkdir()
+        (tmp_path / "project-evil").mkdir()
+        (tmp_path / "project-evil" / "secret.txt").write_text("secret")
+        app_state["base_dir"] = str(tmp_path / "project")
+
+        response = client.get("/api/file?path=../project-evil/secret.txt")
+        assert response.status_code == 403
 
     def test_get_file_binary(self, client: TestClient) -> None:
         """Test getting a binary file returns error."""
-        import os
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-            # Create a binary file
-            test_file = os.path.join(tmpdir, "test.bin")
-            with open(test_file, "wb") as f:
-                f.write(b"\x00\x01\x02\xff\xfe")
-
-            response = client.get("/api/file?path=test.bin")
-            assert response.status_code == 400
-            assert "binary" in response.json()["error"].lower()
+        response = client.get("/api/file?path=test.bin")
+        assert response.status_code == 400
+        assert "binary" in response.json()["error"].lower()
 
     def test_get_file_not_a_file(self, client: TestClient) -> None:
         """Test getting a directory returns error."""
-        import os
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-            # Create a subdirectory
-            subdir = os.path.join(tmpdir, "subdir")
-            os.makedirs(subdir)
+        response = client.get("/api/file?path=subdir")
+        assert response.status_code == 400
+        assert "not a file" in response.json()["error"].lower()
 
-            response = client.get("/api/file?path=subdir")
-            assert response.status_code == 400
-            assert "not a file" in response.json()["error"].lower()
-
-    def test_get_file_language_detection(self, client: TestClient) -> None:
+    @pytest.mark.parametrize(("filename", "expected_lang"), LANGUAGE_FILES)
+    def test_get_file_language_detection(
+        self, client: TestClient, filename: str, expected_lang: str
+    ) -> None:
         """Test language detection from file extensions."""
-        import os
-        import tempfile
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            app_state["base_dir"] = tmpdir
-
-            test_cases = [
-                ("test.ts", "typescript"),
-                ("test.tsx", "tsx"),
-                ("test.js", "javascript"),
-                ("test.rs", "rust"),
-                ("test.go", "go"),
-                ("test.unknown", "text"),
-            ]
-
-            for filename, expected_lang in test_cases:
-                test_file = os.path.join(tmpdir, filename)
-                with open(test_file, "w") as f:
-                    f.write("// code\n")
-
-                response = client.get(f"/api/file?path={filename}")
-                assert response.status_code == 200
-                assert response.json()["language"] == expected_lang
-
-    async def test_get_file_no_base_dir_uses_cwd(self) -> None:
+        response = client.get(f"/api/file?path={filename}")
+        assert response.status_code == 200
+        assert response.json()["language"] == expected_lang
+
+    def test_get_file_no_base_dir_uses_cwd(self) -> None:
         """Test that get_file uses cwd when base_dir is None."""
 
         app_state["base_dir"] = None
         # This should use os.getcwd() as the base directory
-        result = await get_file("nonexistent_file_12345.py")
+        result = get_file("nonexistent_file_12345.py")
         assert result.status_code == 404
 
 
 class TestDiffEndpoint:
     """Tests for the /api/diff endpoint."""
 
-    def test_get_diff_empty(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_diff_empty(self) -> None:
         """Test getting diff when no diff data exists."""
-        response = client.get("/api/diff")
+        response = await get_diff()
         assert response.status_code == 200
-        assert response.json() == {"diff": {}}
+        assert json.loads(response.body) == {"diff": {}}
 
-    def test_get_diff_with_data(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_get_diff_with_data(self) -> None:
         """Test getting diff when diff data exists."""
         app_state["diff_data"] = {
             "src/test.py": {
-                "added_lines": [10, 11, 12],
-                "removed_lines": [5],
+                "added_ranges": [[10, 12]],
+                "removed_ranges": [[5, 5]],
             }
         }
-        response = client.get("/api/diff")
+        response = await get_diff()
         assert response.status_code == 200
-        data = response.json()
+        data = json.loads(response.body)
         assert "src/test.py" in data["diff"]
         assert data["diff"]["src/test.py"]["added_lines"] == [10, 11, 12]
+        assert data["diff"]["src/test.py"]["removed_lines"] == [5]
+
+    @pytest.mark.asyncio
+    async def test_get_diff_ranges_format(self, async_client: httpx.AsyncClient) -> None:
+        """Test that format=ranges returns the stored line ranges unexpanded."""
+        diff_data = {"src/test.py": {"added_ranges": [[10, 12], [20, 20]], "removed_ranges": []}}
+        app_state["diff_data"] = diff_data
+
+        response = await async_client.get("/api/diff?format=ranges")
+        assert response.status_code == 200
+        assert response.json() == {"diff": diff_data}
 
+    @pytest.mark.asyncio
     async def test_get_diff_returns_json_response(self) -> None:
         """Test that get_diff returns proper JSONResponse."""
         result = await get_diff()
@@ -501,19 +969,111 @@ class TestDiffEndpoint:
         assert result.status_code == 200
 
 
+class TestStaticAssets:
+    """Tests for serving the built frontend from memory."""
+
+    @pytest.fixture
+    def assets(self, tmp_path: Path) -> Iterator[None]:
+        """Serve a small fake UI build."""
+        (tmp_path / "assets").mkdir()
+        (tmp_path / "index.html").write_text("<html></html>")
+        (tmp_path / "assets" / "index-abc123.js").write_text("console.log(1)")
+        with patch("redline.server._static_assets", return_value=_load_static_assets(tmp_path)):
+            yield
+
+    def test_index_served_at_root(self, client: TestClient, assets: None) -> None:
+        """Test that / serves index.html and asks the browser to revalidate it."""
+        response = client.get("/")
+        assert response.status_code == 200
+        assert response.text == "<html></html>"
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["etag"].startswith('"')
+
+    def test_hashed_assets_are_immutable(self, client: TestClient, assets: None) -> None:
+        """Test that content-hashed bundle files are cached for a year."""
+        response = client.get("/assets/index-abc123.js")
+        assert response.status_code == 200
+        assert response.text == "console.log(1)"
+        assert "immutable" in response.headers["cache-control"]
+
+    def test_matching_etag_returns_not_modified(self, client: TestClient, assets: None) -> None:
+        """Test that a current browser copy gets 304 without a body."""
+        etag = client.get("/").headers["etag"]
+
+        response = client.get("/", headers={"If-None-Match": f'W/"other", {etag}'})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_large_assets_sent_gzip_compressed(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that a pre-compressed body is chosen from Accept-Encoding."""
+        script = "console.log('redline');\n" * 200
+        (tmp_path / "app.js").write_text(script)
+        with (
+            patch("redline.server.HAS_BROTLI", False),
+            patch("redline.server._static_assets", return_value=_load_static_assets(tmp_path)),
+        ):
+            plain = client.get("/app.js", headers={"Accept-Encoding": "identity"})
+            compressed = client.get("/app.js", headers={"Accept-Encoding": "br;q=0, gzip"})
+            refused = client.get("/app.js", headers={"Accept-Encoding": "gzip;q=0"})
+
+        assert plain.text == script
+        assert "content-encoding" not in plain.headers
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        assert compressed.headers["etag"] != plain.headers["etag"]
+        # httpx decodes the body, which checks that it is valid gzip
+        assert compressed.text == script
+        assert "content-encoding" not in refused.headers
+
+    @pytest.mark.parametrize(
+        "media_type", ["text/javascript", "application/javascript", "application/json"]
+    )
+    def test_scripts_and_json_are_compressible(self, media_type: str) -> None:
+        """Test that JavaScript is compressed whichever media type mimetypes reports."""
+        body = b"console.log('redline');\n" * 200
+        with patch("redline.server.HAS_BROTLI", False):
+            encoded = _compress_asset(body, media_type)
+        assert gzip.decompress(encoded["gzip"]) == body
+
+    def test_large_assets_prefer_brotli(self, client: TestClient, tmp_path: Path) -> None:
+        """Test that Brotli wins over gzip when both are accepted."""
+        pytest.importorskip("brotli")
+        (tmp_path / "app.css").write_text("body { color: red; }\n" * 200)
+        with patch("redline.server._static_assets", return_value=_load_static_assets(tmp_path)):
+            response = client.get("/app.css", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["content-encoding"] == "br"
+
+    def test_unknown_path_not_found(self, client: TestClient, assets: None) -> None:
+        """Test that unknown paths are 404 and API routes still take precedence."""
+        assert client.get("/missing.js").status_code == 404
+        assert client.get("/api/content").json() == {"content": ""}
+
+
+@pytest.fixture
+def mock_git(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Replace the git CLI call with a mock, forcing the CLI diff backend."""
+    mock_run = MagicMock()
+    monkeypatch.setattr("redline.server.HAS_PYGIT2", False)
+    monkeypatch.setattr("redline.server.subprocess.run", mock_run)
+    return mock_run
+
+
 class TestParseGitDiff:
     """Tests for the parse_git_diff function."""
 
-    def test_parse_git_diff_no_git_repo(self) -> None:
+    def test_parse_git_diff_no_git_repo(self, tmp_path: Path, mock_git: MagicMock) -> None:
         """Test parsing diff in a non-git directory."""
-        import tempfile
+        mock_git.return_value = MagicMock(
+            returncode=128, stdout=b"", stderr=b"fatal: not a git repository"
+        )
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            result = parse_git_diff(tmpdir)
-            # Should return empty dict, not raise
-            assert result == {}
+        # Should return empty dict, not raise
+        assert parse_git_diff(str(tmp_path)) == {}
+        assert mock_git.call_args.kwargs["cwd"] == str(tmp_path)
 
-    def test_parse_git_diff_with_mock(self) -> None:
+    def test_parse_git_diff_with_mock(self, mock_git: MagicMock) -> None:
         """Test parsing a mocked git diff output."""
         mock_diff = """diff --git a/src/test.py b/src/test.py
 index abc123..def456 100644
@@ -527,53 +1087,103 @@ index abc123..def456 100644
 -removed line
  final line
 """
-        with patch("redline.server.subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(
-                returncode=0,
-                stdout=mock_diff,
-                stderr=""
-            )
+        mock_git.return_value = MagicMock(returncode=0, stdout=mock_diff.encode(), stderr=b"")
 
-            result = parse_git_diff("/some/path")
+        result = parse_git_diff("/some/path")
 
-            assert "src/test.py" in result
-            # Line 3 and 4 are added (after @@ +2,5 and counting)
-            assert 3 in result["src/test.py"]["added_lines"]
-            assert 4 in result["src/test.py"]["added_lines"]
+        assert "src/test.py" in result
+        # Lines 3 and 4 fall in the added range (after @@ +2,5)
+        added_lines = expand_line_ranges(result["src/test.py"]["added_ranges"])
+        assert 3 in added_lines
+        assert 4 in added_lines
 
-    def test_parse_git_diff_timeout(self) -> None:
+    def test_parse_git_diff_timeout(self, mock_git: MagicMock) -> None:
         """Test handling of git diff timeout."""
-        import subprocess
-
-        with patch("redline.server.subprocess.run") as mock_run:
-            mock_run.side_effect = subprocess.TimeoutExpired("git", 30)
+        mock_git.side_effect = subprocess.TimeoutExpired("git", 30)
 
-            result = parse_git_diff("/some/path")
-            assert result == {}
+        assert parse_git_diff("/some/path") == {}
 
-    def test_parse_git_diff_error(self) -> None:
+    def test_parse_git_diff_error(self, mock_git: MagicMock) -> None:
         """Test handling of git diff error."""
-        with patch("redline.server.subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(
-                returncode=1,
-                stdout="",
-                stderr="fatal: not a git repository"
+        mock_git.return_value = MagicMock(
+            returncode=1, stdout=b"", stderr=b"fatal: not a git repository"
+        )
+
+        assert parse_git_diff("/some/path") == {}
+
+    def test_parse_git_diff_cli_tracks_removed_lines(self, mock_git: MagicMock) -> None:
+        """Test that --unified=0 hunk headers give exact old and new line numbers."""
+        mock_diff = """diff --git a/src/test.py b/src/test.py
+--- a/src/test.py
++++ b/src/test.py
+@@ -3,2 +3,0 @@
+--- old comment
+-removed line
+@@ -10 +8,2 @@
+-changed line
++--- new comment
++++ b/not-a-header.py
+diff --git a/gone.py b/gone.py
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-deleted
+"""
+        mock_git.return_value = MagicMock(returncode=0, stdout=mock_diff.encode(), stderr=b"")
+
+        result = parse_git_diff("/some/path")
+
+        assert result == {
+            "src/test.py": {"added_ranges": [[8, 9]], "removed_ranges": [[3, 4], [10, 10]]}
+        }
+
+    @pytest.mark.parametrize("staged_new_file", [False, True])
+    @pytest.mark.parametrize("use_libgit2", [True, False])
+    def test_parse_git_diff_real_repo(
+        self, tmp_path: Path, use_libgit2: bool, staged_new_file: bool
+    ) -> None:
+        """Test both diff backends against a real repository."""
+        if use_libgit2:
+            pytest.importorskip("pygit2")
+
+        def git(*args: str) -> None:
+            subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                cwd=tmp_path,
+                check=True,
+                capture_output=True,
             )
 
-            result = parse_git_diff("/some/path")
-            assert result == {}
+        git("init", "-q")
+        (tmp_path / "a.txt").write_text("one\ntwo\nthree\nfour\n")
+        git("add", "a.txt")
+        git("commit", "-q", "-m", "init")
+        (tmp_path / "a.txt").write_text("one\n2\nthree\nfour\nfive\n")
+        expected = {"a.txt": {"added_ranges": [[2, 2], [5, 5]], "removed_ranges": [[2, 2]]}}
+        if staged_new_file:
+            # Edited again after staging, so index and working tree differ
+            (tmp_path / "new.txt").write_text("x\ny\n")
+            git("add", "new.txt")
+            (tmp_path / "new.txt").write_text("x\nY\ny\n")
+            expected["new.txt"] = {"added_ranges": [[1, 3]], "removed_ranges": []}
+
+        if use_libgit2:
+            result = parse_git_diff(str(tmp_path))
+        else:
+            with patch("redline.server.HAS_PYGIT2", False):
+                result = parse_git_diff(str(tmp_path))
+
+        assert result == expected
 
 
 class TestCodeComments:
     """Tests for code comment functionality."""
 
-    def test_submit_review_with_code_comments(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_with_code_comments(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
         """Test submitting a review with code comments."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
-        app_state["loop"] = loop
-
         payload = {
             "comments": [],
             "code_comments": [
@@ -590,25 +1200,20 @@ class TestCodeComments:
             "user_overall_comment": "Good code, minor suggestions",
         }
 
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
-        assert future.done()
-        result = future.result()
+        result = await asyncio.wait_for(review_future, timeout=1)
         assert "code_comments" in result
         assert len(result["code_comments"]) == 1
         assert result["code_comments"][0]["file_path"] == "src/test.py"
         assert result["code_comments"][0]["line_start"] == 10
 
-        loop.close()
-
-    def test_submit_review_with_both_comment_types(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_with_both_comment_types(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
         """Test submitting a review with both document and code comments."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
-        app_state["loop"] = loop
-
         payload = {
             "comments": [
                 {
@@ -634,43 +1239,35 @@ class TestCodeComments:
             "user_overall_comment": "Review complete",
         }
 
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
-        result = future.result()
+        result = await asyncio.wait_for(review_future, timeout=1)
         assert len(result["comments"]) == 1
         assert len(result["code_comments"]) == 1
         assert result["comments"][0]["context"] == "surrounding text for test phrase context"
         assert result["code_comments"][0]["line_start"] == 42
 
-        loop.close()
-
-    def test_submit_review_empty_code_comments(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_empty_code_comments(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
         """Test submitting with empty code_comments array."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
-        app_state["loop"] = loop
-
         payload = {
             "comments": [],
             "code_comments": [],
             "user_overall_comment": "LGTM",
         }
 
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
-        result = future.result()
+        result = await asyncio.wait_for(review_future, timeout=1)
         assert result["code_comments"] == []
 
-        loop.close()
-
-    def test_submit_review_multiline_code_comment(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_review_multiline_code_comment(
+        self, async_client: httpx.AsyncClient, review_future: asyncio.Future[Any]
+    ) -> None:
         """Test submitting a code comment spanning multiple lines."""
-        loop = asyncio.new_event_loop()
-        future = loop.create_future()
-        app_state["future"] = future
-        app_state["loop"] = loop
-
         payload = {
             "comments": [],
             "code_comments": [
@@ -687,29 +1284,25 @@ class TestCodeComments:
             "user_overall_comment": None,
         }
 
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
-        result = future.result()
+        result = await asyncio.wait_for(review_future, timeout=1)
         assert result["code_comments"][0]["line_start"] == 100
         assert result["code_comments"][0]["line_end"] == 150
 
-        loop.close()
-
 
 class TestMCPToolsWithBaseDir:
     """Tests for MCP tool functionality with base_dir parameter."""
 
-    @patch("redline.server.webbrowser.open")
-    @patch("redline.server.start_http_server_if_needed")
+    @pytest.mark.asyncio
     @patch("redline.server.parse_git_diff")
     async def test_call_tool_sets_base_dir(
         self,
         mock_parse_diff: MagicMock,
-        mock_start_server: MagicMock,
-        mock_browser: MagicMock
+        mock_start_server: AsyncMock,
     ) -> None:
         """Test that call_tool sets base_dir correctly."""
-        mock_parse_diff.return_value = {"test.py": {"added_lines": [1], "removed_lines": []}}
+        mock_parse_diff.return_value = {"test.py": {"added_ranges": [[1, 1]], "removed_ranges": []}}
 
         async def run_tool() -> Any:
             return await call_tool(
@@ -720,8 +1313,9 @@ class TestMCPToolsWithBaseDir:
                 },
             )
 
+        started = signal_server_start(mock_start_server)
         task = asyncio.create_task(run_tool())
-        await asyncio.sleep(0.05)
+        await asyncio.wait_for(started.wait(), timeout=2)
 
         # Verify base_dir was set
         assert app_state["base_dir"] == "/custom/path"
@@ -730,7 +1324,7 @@ class TestMCPToolsWithBaseDir:
         mock_parse_diff.assert_called_once_with("/custom/path")
 
         # Verify diff_data was set
-        assert app_state["diff_data"] == {"test.py": {"added_lines": [1], "removed_lines": []}}
+        assert app_state["diff_data"] == {"test.py": {"added_ranges": [[1, 1]], "removed_ranges": []}}
 
         # Clean up
         future = app_state.get("future")
@@ -738,14 +1332,40 @@ class TestMCPToolsWithBaseDir:
             future.set_result({"comments": [], "user_overall_comment": "LGTM"})
         await task
 
+    @pytest.mark.asyncio
+    @patch("redline.server.parse_git_diff")
+    async def test_call_tool_parses_diff_off_event_loop(
+        self,
+        mock_parse_diff: MagicMock,
+        mock_start_server: AsyncMock,
+    ) -> None:
+        """Test that the blocking git diff runs in a worker thread."""
+        diff_threads: list[int] = []
+        mock_parse_diff.side_effect = lambda _base_dir: diff_threads.append(
+            threading.get_ident()
+        ) or {}
+
+        started = signal_server_start(mock_start_server)
+        task = asyncio.create_task(
+            call_tool("request_human_review", {"markdown_spec": "# Test", "base_dir": "/p"})
+        )
+        await asyncio.wait_for(started.wait(), timeout=2)
+
+        assert len(diff_threads) == 1
+        assert diff_threads[0] != threading.get_ident()
+
+        app_state["future"].set_result({"comments": [], "user_overall_comment": "LGTM"})
+        await task
+
 
 class TestPendingReview:
     """Tests for pending review functionality (interrupted tool call recovery)."""
 
-    def test_submit_stores_pending_review(self, client: TestClient) -> None:
+    @pytest.mark.asyncio
+    async def test_submit_stores_pending_review(self, async_client: httpx.AsyncClient) -> None:
         """Test that submit_review stores the review as pending."""
         payload = {"comments": [], "user_overall_comment": "Test review"}
-        response = client.post("/api/submit", json=payload)
+        response = await async_client.post("/api/submit", json=payload)
         assert response.status_code == 200
 
         # Check pending review was stored
@@ -753,11 +1373,8 @@ class TestPendingReview:
         assert app_state["pending_review_time"] is not None
         assert time.time() - app_state["pending_review_time"] < 1  # Within last second
 
-    @patch("redline.server.webbrowser.open")
-    @patch("redline.server.start_http_server_if_needed")
-    async def test_call_tool_returns_pending_review(
-        self, mock_start_server: MagicMock, mock_browser: MagicMock
-    ) -> None:
+    @pytest.mark.asyncio
+    async def test_call_tool_returns_pending_review(self, mock_browser: MagicMock) -> None:
         """Test that call_tool returns a recent pending review immediately."""
         pending_data = {
             "comments": [{"id": "1", "quote": "test", "user_comment": "pending"}],
@@ -783,10 +1400,22 @@ class TestPendingReview:
         # Browser should NOT have been opened (returned immediately)
         mock_browser.assert_not_called()
 
-    @patch("redline.server.webbrowser.open")
-    @patch("redline.server.start_http_server_if_needed")
+    @pytest.mark.asyncio
+    async def test_call_tool_returns_unescaped_indented_json(self) -> None:
+        """Test that the tool result keeps non-ASCII text as-is and is indented."""
+        pending_data = {"comments": [], "user_overall_comment": "Ça marche — 👍"}
+        app_state["pending_review"] = pending_data
+        app_state["pending_review_time"] = time.time()
+
+        result = await call_tool("request_human_review", {"markdown_spec": "# Doc"})
+
+        assert "Ça marche — 👍" in result[0].text
+        assert '\n  "comments": []' in result[0].text
+        assert json.loads(result[0].text) == pending_data
+
+    @pytest.mark.asyncio
     async def test_call_tool_ignores_old_pending_review(
-        self, mock_start_server: MagicMock, mock_browser: MagicMock
+        self, mock_browser: MagicMock, mock_start_server: AsyncMock
     ) -> None:
         """Test that call_tool ignores pending reviews older than 5 minutes."""
         old_data = {
@@ -802,8 +1431,9 @@ class TestPendingReview:
                 {"markdown_spec": "# Test", "context": "test"},
             )
 
+        started = signal_server_start(mock_start_server)
         task = asyncio.create_task(run_tool())
-        await asyncio.sleep(0.05)
+        await asyncio.wait_for(started.wait(), timeout=2)
 
         # Should have cleared old pending and started new review
         assert app_state["pending_review"] is None
@@ -0,0 +1,81 @@
+"""Tests for the Redline theme registry."""
+
+import re
+
+import pytest
+
+from redline.themes import get_theme, get_theme_descriptions, list_themes
+
+# Every theme must define these CSS custom properties
+REQUIRED_COLORS = frozenset(
+    {
+        "bg_page",
+        "bg_card",
+        "bg_card_hover",
+        "bg_input",
+        "bg_code",
+        "bg_highlight",
+        "bg_highlight_hover",
+        "text_primary",
+        "text_secondary",
+        "text_muted",
+        "text_inverse",
+        "accent_primary",
+        "accent_primary_hover",
+        "accent_secondary",
+        "accent_success",
+        "accent_error",
+        "accent_warning",
+        "border_default",
+        "border_light",
+        "border_accent",
+        "shadow_sm",
+        "shadow_md",
+        "shadow_lg",
+    }
+)
+
+# Error message for names outside the theme registry
+UNKNOWN_THEME_RE = re.compile("Unknown theme")
+
+
+class TestThemes:
+    """Tests for theme functionality."""
+
+    def test_list_themes(self) -> None:
+        """Test listing available themes."""
+        assert list_themes() == ("clean", "dark", "forest", "minimal", "ocean", "sunset")
+
+    @pytest.mark.parametrize("name", list_themes())
+    def test_theme_has_required_shape(self, name: str) -> None:
+        """Test that each theme is named after its key and defines every color."""
+        theme = get_theme(name)
+        assert theme["name"] == name
+        assert theme["description"]
+        missing = REQUIRED_COLORS - theme["colors"].keys()
+        assert not missing, f"Theme '{name}' missing colors {sorted(missing)}"
+
+    def test_get_theme_dark(self) -> None:
+        """Test getting the dark theme."""
+        theme = get_theme("dark")
+        assert theme["name"] == "dark"
+        assert theme["colors"]["bg_page"] == "#0f172a"
+
+    def test_get_theme_case_insensitive(self) -> None:
+        """Test that theme names are case-insensitive."""
+        theme1 = get_theme("DARK")
+        theme2 = get_theme("Dark")
+        theme3 = get_theme("dark")
+        assert theme1 == theme2 == theme3
+
+    def test_get_theme_invalid(self) -> None:
+        """Test getting an invalid theme raises ValueError."""
+        with pytest.raises(ValueError, match=UNKNOWN_THEME_RE):
+            get_theme("nonexistent")
+
+    def test_get_theme_descriptions(self) -> None:
+        """Test getting theme descriptions."""
+        descriptions = get_theme_descriptions()
+        assert descriptions.keys() == set(list_themes())
+        assert "clean" in descriptions
+        assert "professional" in descriptions["clean"].lower()